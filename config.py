@@ -1,3 +1,4 @@
+# Only append to this list: positions are stored as bits in Job.technology_mask
 allowed_technologies_python = [
     'AI',
     'AWS',
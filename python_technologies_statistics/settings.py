@@ -39,9 +39,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_celery_beat",
     "web",
-    "bokeh",
 ]
 
 MIDDLEWARE = [
@@ -79,17 +79,79 @@ WSGI_APPLICATION = "python_technologies_statistics.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections come from a pool per process (see web.postgresql_pool), so
+# Postgres sees at most max_size connections per web worker, Celery worker
+# and crawl: keep their sum under its max_connections. min_size are kept
+# open, others are closed after max_idle seconds; getting one waits up to
+# timeout seconds. Every connection is checked when handed out.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'web.postgresql_pool',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', cast=int),
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=30, cast=float),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=600, cast=float),
+                'check': config('DB_POOL_CHECK', default=True, cast=bool),
+            },
+        },
+    }
+}
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_URL', default=config('REDIS_URL')),
     }
 }
 
+# Seconds a filtered dashboard aggregate stays cached
+DASHBOARD_CACHE_TIMEOUT = config(
+    'DASHBOARD_CACHE_TIMEOUT', default=60 * 60, cast=int
+)
+
+# Fold the jobs into the dashboard counters chunk by chunk instead of
+# loading them all into one DataFrame. The ceiling (in bytes) sizes the
+# chunks and caps the rows kept for the company chart: beyond it its
+# points are grouped by Postgres instead.
+DASHBOARD_CHUNKED_AGGREGATION = config(
+    'DASHBOARD_CHUNKED_AGGREGATION', default=False, cast=bool
+)
+DASHBOARD_MEMORY_CEILING = config(
+    'DASHBOARD_MEMORY_CEILING', default=256 * 1024 * 1024, cast=int
+)
+
+# Build the company and technology charts from per-day sketches, kept
+# up to date at ingest, instead of the jobs: counts become estimates with
+# error bounds shown on the page, but the cost no longer grows with the
+# number of jobs. Filters on English, years or technologies still need
+# the jobs. See web.sketches and `manage.py buildsketches`
+DASHBOARD_APPROXIMATE_AGGREGATION = config(
+    'DASHBOARD_APPROXIMATE_AGGREGATION', default=False, cast=bool
+)
+
+# Aggregate queries of async dashboard requests running at once, per web
+# worker, each on its own pooled connection. Keep it below
+# DB_POOL_MAX_SIZE, so other requests still get a connection
+DASHBOARD_PARALLEL_AGGREGATES = config(
+    'DASHBOARD_PARALLEL_AGGREGATES', default=4, cast=int
+)
+
+# Number of processes building the dashboard charts in parallel, per web
+# worker; 0 builds them one after another in the request thread
+DASHBOARD_RENDER_PROCESSES = config(
+    'DASHBOARD_RENDER_PROCESSES', default=0, cast=int
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -131,6 +193,48 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Columnar snapshot of the job data, written after every crawl and
+# memory-mapped by the dashboard
+JOB_SNAPSHOT_PATH = config(
+    'JOB_SNAPSHOT_PATH', default=str(BASE_DIR / 'snapshots' / 'jobs.arrow')
+)
+
+# The unfiltered dashboard, pre-rendered after every crawl for these
+# min_vacancies values and served by nginx straight from the directory,
+# see `manage.py renderstatic` and deploy/nginx.conf
+STATIC_DASHBOARD_DIR = config(
+    'STATIC_DASHBOARD_DIR', default=str(BASE_DIR / 'rendered')
+)
+STATIC_DASHBOARD_MIN_VACANCIES = [1, 2, 3, 5, 10]
+
+# Jobs are partitioned by posting month. With a retention set, months older
+# than it are archived to Parquet files and only their counts stay in
+# Postgres, see `manage.py compactjobs`. Only the monthly technology trends
+# read those counts: the other charts, /api/ and /export/ lose the archived
+# months. 0 keeps every job
+JOB_RETENTION_MONTHS = config('JOB_RETENTION_MONTHS', default=0, cast=int)
+JOB_PARTITION_MONTHS_AHEAD = 3
+JOB_ARCHIVE_DIR = config('JOB_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+
+# Import time budgets in ms of django.setup() plus the modules loaded by web
+# workers, Celery workers and the crawler. Checked by ImportTimeTests in
+# web/tests.py
+IMPORT_TIME_BUDGETS = {
+    'python_technologies_statistics.urls': 1000,
+    'web.tasks': 750,
+    'scraper.pipelines': 1000,
+}
+
+# Redis instance whose pub/sub carries live dashboard updates
+LIVE_UPDATES_URL = config('LIVE_UPDATES_URL', default=config('REDIS_URL'))
+
+# Crawls lease each technology here while crawling it, so overlapping
+# requests for it merge into the running crawl. Leases are recorded in the
+# database too, the only place left while Redis is unreachable, see
+# web.crawls
+CRAWL_LEASE_URL = config('CRAWL_LEASE_URL', default=config('REDIS_URL'))
+CRAWL_LEASE_TTL = config('CRAWL_LEASE_TTL', default=300, cast=int)
+
 CELERY_BROKER_URL = config('REDIS_URL')
 CELERY_RESULT_BACKEND = config('REDIS_URL')
 CELERY_ACCEPT_CONTENT = ['json']
@@ -144,4 +248,8 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=20, minute=0),
         'args': (['Python'],),
     },
+    'compact-jobs-every-month': {
+        'task': 'web.tasks.compact_jobs',
+        'schedule': crontab(day_of_month=1, hour=3, minute=0),
+    },
 }
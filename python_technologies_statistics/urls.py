@@ -17,9 +17,33 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
-from web import views
+from web import api, exports, live, search, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", views.index, name="index"),
+    path("updates/", live.job_updates, name="job-updates"),
+    path(
+        "metrics/db-pool/",
+        views.database_pool_stats,
+        name="database-pool-stats"
+    ),
+    path("search/", search.search, name="search"),
+    path("api/jobs/", api.jobs, name="api-jobs"),
+    path(
+        "api/technologies/",
+        api.technology_counts,
+        name="api-technology-counts"
+    ),
+    path("api/companies/", api.company_counts, name="api-company-counts"),
+    path(
+        "export/jobs.<str:file_format>",
+        exports.export_jobs,
+        name="export-jobs"
+    ),
+    path(
+        "export/statistics.<str:file_format>",
+        exports.export_statistics,
+        name="export-statistics"
+    ),
 ]
@@ -16,3 +16,7 @@ os.environ.setdefault(
 )
 
 application = get_wsgi_application()
+
+from web.rendering import warm_render_pool  # noqa: E402 (needs settings)
+
+warm_render_pool()
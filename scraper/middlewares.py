@@ -3,7 +3,12 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -101,3 +106,130 @@ class ScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+@dataclass
+class SlotState:
+    concurrency: int
+    # Moving average and lowest recent download latency, in seconds
+    latency: Optional[float] = None
+    baseline: Optional[float] = None
+    # Responses since the last change, a window is one round of requests
+    responses: int = 0
+    backoff_until: float = 0.0
+
+    def observe(self, latency: float) -> None:
+        if self.latency is None:
+            self.latency = self.baseline = latency
+            return
+        self.latency += 0.2 * (latency - self.latency)
+        # The baseline creeps up, so a server that got slower for good is
+        # eventually taken as the new normal
+        self.baseline = min(latency, self.baseline * 1.01)
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Tunes the concurrency of each download slot (one per domain) from
+    what the server answers: one more request in flight after a window
+    of fast responses while requests are waiting, one fewer when latency
+    climbs well above its baseline (the server is queueing them), and
+    half as many after a 429, a 5xx or a failed download.
+
+    Must see responses before RetryMiddleware (550) turns them into
+    retries, so its order should be higher.
+    """
+
+    def __init__(self, crawler, minimum, maximum, latency_tolerance):
+        self.crawler = crawler
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.states: Dict[str, SlotState] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_CONCURRENCY_ENABLED"):
+            raise NotConfigured
+        return cls(
+            crawler,
+            settings.getint("ADAPTIVE_CONCURRENCY_MIN"),
+            settings.getint("ADAPTIVE_CONCURRENCY_MAX"),
+            settings.getfloat("ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE"),
+        )
+
+    def get_slot(self, request):
+        key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return key, None, None
+        state = self.states.setdefault(key, SlotState(slot.concurrency))
+        # Idle slots are dropped by the downloader, a new one starts
+        # from the default concurrency
+        slot.concurrency = state.concurrency
+        return key, slot, state
+
+    def set_concurrency(self, key, slot, state, concurrency, reason):
+        concurrency = max(self.minimum, min(self.maximum, concurrency))
+        if concurrency == state.concurrency:
+            return
+        stats = self.crawler.stats
+        stats.inc_value(
+            "adaptive_concurrency/increases"
+            if concurrency > state.concurrency
+            else "adaptive_concurrency/decreases"
+        )
+        stats.max_value("adaptive_concurrency/max", concurrency)
+        self.crawler.spider.logger.debug(
+            "Concurrency of %s: %d -> %d (%s)",
+            key, state.concurrency, concurrency, reason
+        )
+        state.concurrency = slot.concurrency = concurrency
+        state.responses = 0
+
+    def back_off(self, key, slot, state, reason):
+        now = time.monotonic()
+        # Requests already in flight fail together, halve once per round
+        if now < state.backoff_until:
+            return
+        state.backoff_until = now + (state.latency or 1.0)
+        self.set_concurrency(
+            key, slot, state, state.concurrency // 2, reason
+        )
+
+    def process_response(self, request, response, spider):
+        key, slot, state = self.get_slot(request)
+        if slot is None:
+            return response
+        if response.status == 429 or response.status >= 500:
+            self.back_off(key, slot, state, f"status {response.status}")
+            return response
+        latency = request.meta.get("download_latency")
+        if latency is None:
+            return response
+        state.observe(latency)
+        state.responses += 1
+        if state.responses < state.concurrency:
+            return response
+        if state.latency > state.baseline * self.latency_tolerance:
+            self.set_concurrency(
+                key, slot, state, state.concurrency - 1,
+                f"latency {state.latency:.2f}s"
+            )
+        elif slot.queue:
+            self.set_concurrency(
+                key, slot, state, state.concurrency + 1,
+                f"latency {state.latency:.2f}s"
+            )
+        else:
+            state.responses = 0
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, IgnoreRequest):
+            return None
+        key, slot, state = self.get_slot(request)
+        if slot is not None:
+            self.back_off(key, slot, state, type(exception).__name__)
+        return None
@@ -1,18 +1,41 @@
-import django
+import os
 
 from itemadapter import ItemAdapter
 from scrapy.exceptions import DropItem
-from twisted.internet import threads
-from web.models import Job, Technology
+from twisted.internet import reactor, threads
 
-django.setup()
+
+def setup_django() -> None:
+    # Django is only loaded once a spider opens, so importing the
+    # pipeline (e.g. to list spiders) stays cheap
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault(
+            "DJANGO_SETTINGS_MODULE", "python_technologies_statistics.settings"
+        )
+        django.setup()
 
 
 class JobPipeline:
+    def open_spider(self, spider):
+        setup_django()
+        from web.sketches import PendingSketches
+
+        self.sketches = PendingSketches()
+
     def process_item(self, item, spider):
         return threads.deferToThread(self.handle_item, item, spider)
 
     def handle_item(self, item, spider):
+        from django.db.models import F
+
+        from web.bitmask import technology_mask
+        from web.live import publish_job
+        from web.models import Job, Technology
+        from web.versioning import bump_data_version
+
         adapter = ItemAdapter(item)
         try:
             job, created = Job.objects.get_or_create(
@@ -23,10 +46,68 @@ class JobPipeline:
                 experience=adapter["experience"],
                 defaults={"url": adapter["url"]}
             )
-            for tech in adapter.get("technologies", []):
+            technologies = adapter.get("technologies", [])
+            linked = set() if created else set(
+                job.technologies.values_list("name", flat=True)
+            )
+            added = set(technologies) - linked
+            for tech in technologies:
                 print(tech)
+                if tech not in added:
+                    continue
                 technology, _ = Technology.objects.get_or_create(name=tech)
                 job.technologies.add(technology)
+            mask = technology_mask(technologies)
+            # Only counts the row when some bit is new
+            mask_changed = Job.objects.filter(pk=job.pk).exclude(
+                technology_mask=F("technology_mask").bitor(mask)
+            ).update(technology_mask=F("technology_mask").bitor(mask))
+            # Fields of a created job still hold the item's values, e.g.
+            # the date and years as text
+            job_date = Job._meta.get_field("date").to_python(job.date)
+            if created:
+                self.sketches.add(
+                    job_date, int(job.experience), job.company, mask
+                )
+            elif mask_changed:
+                self.sketches.add_technologies(
+                    job_date, job.experience, mask & ~job.technology_mask
+                )
+            # A re-crawled job that is unchanged keeps the cached pages
+            if created or added or mask_changed:
+                bump_data_version()
+            if created:
+                publish_job(job, technologies)
+                # Stats belong to the reactor thread, recorded per crawl run
+                reactor.callFromThread(
+                    spider.crawler.stats.inc_value, "jobs_created"
+                )
             return item
         except Exception as e:
             raise DropItem(f"Error saving item: {e}")
+        finally:
+            from django.db import connection
+
+            # Hand the connection back to the pool between items, so the
+            # reactor threads share it instead of each keeping one
+            connection.close()
+
+    def save_sketches(self, spider):
+        from django.db import connection
+
+        from web.versioning import bump_data_version
+
+        try:
+            saved = self.sketches.save()
+            if saved:
+                # Approximate pages cached during the crawl lack its jobs
+                bump_data_version()
+            spider.logger.info("Updated %d day sketches", saved)
+        finally:
+            connection.close()
+
+    def close_spider(self, spider):
+        from web.postgresql_pool.base import pool_stats
+
+        spider.logger.info("Database pool: %s", pool_stats())
+        return threads.deferToThread(self.save_sketches, spider)
@@ -13,6 +13,11 @@ class DjinniSpider(scrapy.Spider):
     name = "djinni"
     allowed_domains = ["djinni.co"]
 
+    # Job pages are fetched before the next listing page adds more of
+    # them, so pending requests stay around one listing page
+    DETAILS_PRIORITY = 10
+    LISTING_PRIORITY = 0
+
     def __init__(self, technologies: List[str] = None, *args, **kwargs):
         super(DjinniSpider, self).__init__(*args, **kwargs)
         if technologies is None or not isinstance(technologies, list):
@@ -31,6 +36,7 @@ class DjinniSpider(scrapy.Spider):
             yield scrapy.Request(
                 url=response.urljoin(details_url),
                 callback=self._parse_job_details,
+                priority=self.DETAILS_PRIORITY,
                 headers={
                     'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8',
                 }
@@ -40,7 +46,11 @@ class DjinniSpider(scrapy.Spider):
             "li.page-item:last-child a.page-link::attr(href)"
         ).get()
         if next_page:
-            yield response.follow(next_page, callback=self.parse)
+            yield response.follow(
+                next_page,
+                callback=self.parse,
+                priority=self.LISTING_PRIORITY
+            )
 
     def _parse_job_details(
             self, response: Response
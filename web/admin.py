@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CrawlRun
+
+
+@admin.register(CrawlRun)
+class CrawlRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "technologies", "status", "started_at", "duration",
+        "items_scraped", "jobs_created", "merged_requests",
+    )
+    list_filter = ("status",)
+    ordering = ("-started_at",)
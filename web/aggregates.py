@@ -0,0 +1,321 @@
+import dataclasses
+import logging
+from math import pi
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+from bokeh.palettes import Spectral6
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import (
+    When, Value, Case, CharField, Count, Min, QuerySet, Sum
+)
+
+from .bitmask import (
+    TECHNOLOGIES, cooccurrence_matrix, match_masks, unpack_masks
+)
+from . import incremental, sketches
+from .filters import JobFilters, TREND_PERIODS, experience_level_case
+from .models import Job, JobMonthRollup
+from .snapshot import (
+    load_snapshot, filter_snapshot, snapshot_technology_counts
+)
+
+logger = logging.getLogger(__name__)
+
+TREND_TOP_TECHNOLOGIES = 8
+TREND_MOVING_AVERAGE = 3
+
+
+def setup_initial_queryset() -> QuerySet:
+    jobs_qs: QuerySet = Job.objects.all()
+    jobs_qs = jobs_qs.prefetch_related("technologies")
+    jobs_qs = jobs_qs.annotate(experience_level=Case(
+        When(experience=1, then=Value("Junior")),
+        When(experience__in=[2, 3], then=Value("Middle")),
+        When(experience__gte=5, then=Value("Senior")),
+        default=Value('Other'),
+        output_field=CharField(),
+    ))
+    return jobs_qs
+
+
+def load_jobs_frame(filters: JobFilters, columns: List[str]) -> pd.DataFrame:
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return filter_snapshot(snapshot, filters).select(columns).to_pandas()
+    # Same row order as the snapshot and the chunked aggregation
+    jobs_qs = filters.apply(setup_initial_queryset()).order_by("id")
+    return pd.DataFrame(list(jobs_qs.values(*columns)), columns=columns)
+
+
+def approximate(filters: JobFilters) -> bool:
+    return (
+        settings.DASHBOARD_APPROXIMATE_AGGREGATION
+        and sketches.supports(filters)
+    )
+
+
+def count_jobs_by(filters: JobFilters, column: str) -> pd.Series:
+    if settings.DASHBOARD_CHUNKED_AGGREGATION:
+        return incremental.value_counts(filters, column)
+    return load_jobs_frame(filters, [column])[column].value_counts()
+
+
+def aggregate_technology_data(filters: JobFilters) -> list[Dict[str, Any]]:
+    if approximate(filters):
+        return sketches.technology_counts(filters)
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return snapshot_technology_counts(filter_snapshot(snapshot, filters))
+    tech_data: list[Dict[str, Any]] = list(
+        filters.apply(Job.objects.all())
+        .annotate(experience_level=experience_level_case())
+        .values("technologies__name", "experience_level")
+        .annotate(count=Count("technologies"))
+        .order_by("experience_level", "technologies__name"))
+    return tech_data
+
+
+def aggregate_english_levels() -> List[str]:
+    return list(
+        Job.objects.order_by("english")
+        .values_list("english", flat=True)
+        .distinct()
+    )
+
+
+def aggregate_experience_data(filters: JobFilters) -> pd.DataFrame:
+    experience_counts: pd.DataFrame = count_jobs_by(
+        filters, "experience"
+    ).reset_index()
+    experience_counts.columns = ["experience_level", "count"]
+    experience_counts["angle"] = experience_counts['count'] / experience_counts[
+        "count"].sum() * 2 * pi
+    experience_counts["color"] = Spectral6[:len(experience_counts)]
+    experience_counts["legend"] = experience_counts.apply(
+        lambda x: f"{x['experience_level']} років - {x['count']} вакансій",
+        axis=1
+    )
+    return experience_counts
+
+
+def aggregate_english_level_data(filters: JobFilters) -> pd.DataFrame:
+    english_level_counts: pd.DataFrame = count_jobs_by(
+        filters, "english"
+    ).reset_index()
+    english_level_counts.columns = ["english_level", "count"]
+    return english_level_counts
+
+
+def company_points(jobs: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per point of the chart, a company's jobs of a day share it.
+    Groups keep their first appearance, so companies and dates keep
+    their order on the axes. This is what gets cached, not every job.
+    """
+    jobs = jobs.assign(date_str=jobs["date"].apply(
+        lambda x: x.strftime("%Y-%m-%d") if pd.notnull(x) else ""
+    ))
+    jobs.sort_values("date", inplace=True, kind="stable")
+    return (
+        jobs.groupby(["company", "date_str"], sort=False)
+        .agg(
+            date=("date", "first"),
+            title=("title", "; ".join),
+            url=("url", "first"),
+            url_all=("url", ",".join),
+            jobs=("url", "size"),
+        )
+        .reset_index()
+    )
+
+
+def company_points_in_database(
+        filters: JobFilters, min_vacancies: int
+) -> pd.DataFrame:
+    """Same as ``company_points``, grouped by Postgres."""
+    companies = (
+        filters.apply(Job.objects.all())
+        .values("company")
+        .annotate(jobs=Count("id"))
+        .filter(jobs__gte=min_vacancies)
+        .values("company")
+    )
+    rows = (
+        filters.apply(Job.objects.filter(company__in=companies))
+        .values("company", "date")
+        .annotate(
+            first_id=Min("id"),
+            titles=ArrayAgg("title", ordering="id"),
+            urls=ArrayAgg("url", ordering="id"),
+        )
+        .order_by("date", "first_id")
+    )
+    points = pd.DataFrame(
+        list(rows), columns=["company", "date", "titles", "urls"]
+    )
+    return pd.DataFrame({
+        "company": points["company"],
+        "date_str": points["date"].apply(lambda x: x.strftime("%Y-%m-%d")),
+        "date": points["date"],
+        "title": points["titles"].apply("; ".join),
+        "url": points["urls"].str[0],
+        "url_all": points["urls"].apply(",".join),
+        "jobs": points["urls"].apply(len),
+    })
+
+
+def aggregate_company_data(
+        filters: JobFilters,
+        min_vacancies: int
+) -> pd.DataFrame:
+    columns = ["date", "company", "english", "experience", "url", "title"]
+    if approximate(filters):
+        return company_points(sketches.company_rows(filters, min_vacancies))
+    if settings.DASHBOARD_CHUNKED_AGGREGATION:
+        try:
+            return incremental.company_points(filters, min_vacancies)
+        except incremental.MemoryCeilingExceeded as error:
+            logger.warning("%s, grouping them in the database", error)
+            return company_points_in_database(filters, min_vacancies)
+
+    df: pd.DataFrame = load_jobs_frame(filters, columns)
+
+    company_vacancies_counts: pd.Series = df["company"].value_counts()
+    companies_with_multiple_applications: pd.Index = company_vacancies_counts[
+        company_vacancies_counts >= min_vacancies].index
+
+    return company_points(
+        df[df["company"].isin(companies_with_multiple_applications)]
+    )
+
+
+def aggregate_approximation(filters: JobFilters) -> Optional[Dict[str, Any]]:
+    """The error bounds shown when the dashboard uses the sketches."""
+    if not approximate(filters):
+        return None
+    return sketches.approximation_summary(filters)
+
+
+def aggregate_technology_cooccurrence(
+        filters: JobFilters
+) -> tuple[List[str], np.ndarray]:
+    # Technology filters are applied to the masks below, with NumPy
+    sql_filters = dataclasses.replace(
+        filters, technologies=(), any_technologies=()
+    )
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        masks, counts = np.unique(
+            filter_snapshot(snapshot, sql_filters)
+            .column("technology_mask").to_numpy(),
+            return_counts=True
+        )
+    else:
+        rows = np.array(
+            sql_filters.apply(Job.objects.all())
+            .values_list("technology_mask")
+            .annotate(count=Count("id"))
+            .order_by(),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        masks, counts = rows[:, 0], rows[:, 1]
+
+    selected = match_masks(
+        masks, filters.technologies, filters.any_technologies
+    )
+    matrix = cooccurrence_matrix(masks[selected], counts[selected])
+    present = np.flatnonzero(matrix.diagonal())
+    return (
+        [TECHNOLOGIES[i] for i in present],
+        matrix[np.ix_(present, present)],
+    )
+
+
+def aggregate_technology_trends(
+        filters: JobFilters, period: str
+) -> pd.DataFrame:
+    """
+    Returns the share of jobs (in %) mentioning each technology per week
+    or month, plus its moving average, indexed by period start.
+
+    Jobs are bucketed by period and technology mask in the database, so
+    only (period, mask, count) rows are loaded, never individual jobs.
+    Monthly trends also cover the archived months, from their rollups.
+    """
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        import pyarrow.compute as pc
+
+        table = filter_snapshot(snapshot, filters)
+        # Bucketed in Arrow like in the database, only the buckets reach
+        # pandas. Weeks start on Monday, as with TruncWeek
+        buckets = (
+            table.select(["technology_mask"])
+            .append_column("period", pc.floor_temporal(
+                table["date"], unit=period, week_starts_monday=True
+            ))
+            .group_by(["period", "technology_mask"])
+            .aggregate([([], "count_all")])
+            .to_pandas()
+            .rename(columns={"count_all": "count"})
+        )
+    else:
+        buckets = pd.DataFrame(
+            list(
+                filters.apply(Job.objects.all())
+                .annotate(period=TREND_PERIODS[period]("date"))
+                .values_list("period", "technology_mask")
+                .annotate(count=Count("id"))
+                .order_by("period")
+            ),
+            columns=["period", "technology_mask", "count"],
+        )
+    if period == "month":
+        archived = pd.DataFrame(
+            list(
+                filters.apply(JobMonthRollup.objects.all())
+                .values_list("date", "technology_mask")
+                .annotate(count=Sum("jobs"))
+                .order_by()
+            ),
+            columns=["period", "technology_mask", "count"],
+        )
+        if not archived.empty:
+            buckets = pd.concat([archived, buckets], ignore_index=True)
+    if buckets.empty:
+        return pd.DataFrame()
+
+    periods, period_index = np.unique(
+        pd.to_datetime(buckets["period"]).dt.tz_localize(None),
+        return_inverse=True
+    )
+    counts = buckets["count"].to_numpy(dtype=np.int64)
+    technology_counts = np.zeros((len(periods), len(TECHNOLOGIES)))
+    np.add.at(
+        technology_counts,
+        period_index,
+        unpack_masks(buckets["technology_mask"].to_numpy(dtype=np.int64))
+        * counts[:, None]
+    )
+    jobs_per_period = np.bincount(period_index, weights=counts)
+
+    share = pd.DataFrame(
+        technology_counts / jobs_per_period[:, None] * 100,
+        index=pd.DatetimeIndex(periods, name="period"),
+        columns=TECHNOLOGIES,
+    )
+    top = technology_counts.sum(axis=0).argsort()[::-1]
+    share = share.iloc[:, top[:TREND_TOP_TECHNOLOGIES]]
+    # Periods without jobs count as 0%, the moving average mustn't skip them
+    share = share.reindex(
+        pd.date_range(
+            periods[0], periods[-1],
+            freq="W-MON" if period == "week" else "MS", name="period"
+        ),
+        fill_value=0,
+    )
+    moving_average = share.rolling(TREND_MOVING_AVERAGE, min_periods=1).mean()
+    return share.join(moving_average, rsuffix=" (avg)")
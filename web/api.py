@@ -0,0 +1,133 @@
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from django.db.models import Count, F, Prefetch, QuerySet
+from django.http import HttpRequest, JsonResponse
+
+from .filters import JobFilters, experience_level_case
+from .models import Job, Technology
+from .pagination import (
+    InvalidCursor, keyset_page, keyset_page_in_memory, parse_limit, sort_rows
+)
+from .versioning import versioned_page
+from .views import cached_aggregate
+
+# Served by job_date_id_idx, newest first
+JOB_ORDERING = ["-date", "-id"]
+TECHNOLOGY_ORDERING = ["experience_level", "-count", "technology"]
+COMPANY_ORDERING = ["-count", "company"]
+
+
+def page_params(request: HttpRequest) -> tuple:
+    return (
+        request.GET.get("cursor", ""), parse_limit(request.GET.get("limit"))
+    )
+
+
+def paginated_response(
+        request: HttpRequest,
+        rows: Union[QuerySet, Sequence[Any]],
+        ordering: Sequence[str],
+        serialize: Callable[[Any], Dict[str, Any]],
+) -> JsonResponse:
+    """
+    One keyset page of ``rows`` as ``{"results": [...], "next": cursor}``,
+    pass ``next`` back as ``cursor`` for the following page. ``rows`` is
+    a queryset, or a list sorted by ``sort_rows``.
+    """
+    page_of = (
+        keyset_page if isinstance(rows, QuerySet) else keyset_page_in_memory
+    )
+    try:
+        page, cursor = page_of(
+            rows,
+            ordering,
+            request.GET.get("cursor"),
+            parse_limit(request.GET.get("limit")),
+        )
+    except InvalidCursor as error:
+        return JsonResponse({"error": str(error)}, status=400)
+    return JsonResponse({
+        "results": [serialize(row) for row in page],
+        "next": cursor,
+    })
+
+
+def job_result(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "date": job.date.isoformat(),
+        "title": job.title,
+        "company": job.company,
+        "url": job.url,
+        "english": job.english,
+        "experience": job.experience,
+        # Prefetched, sorted by name
+        "technologies": [
+            technology.name for technology in job.technologies.all()
+        ],
+    }
+
+
+@versioned_page(page_params)
+def jobs(request: HttpRequest) -> JsonResponse:
+    """Jobs matching the dashboard filters with their technologies."""
+    queryset = (
+        JobFilters.from_request(request)
+        .apply(Job.objects.all())
+        .only(
+            "id", "date", "title", "company", "url", "english", "experience"
+        )
+        # One query for the technologies of the whole page
+        .prefetch_related(Prefetch(
+            "technologies",
+            queryset=Technology.objects.order_by("name"),
+        ))
+    )
+    return paginated_response(request, queryset, JOB_ORDERING, job_result)
+
+
+# A cursor on a count would regroup every job for each page. The counts
+# are aggregated once per filters and data version instead, and pages
+# are cut from the cached rows: one per level and technology, or per
+# company, so a few thousand at most
+def technology_rows(filters: JobFilters) -> List[Dict[str, Any]]:
+    return sort_rows(
+        filters.apply(Job.objects.all())
+        .filter(technologies__isnull=False)
+        .annotate(
+            experience_level=experience_level_case(),
+            technology=F("technologies__name"),
+        )
+        .values("experience_level", "technology")
+        .annotate(count=Count("id"))
+        .order_by(),
+        TECHNOLOGY_ORDERING,
+    )
+
+
+def company_rows(filters: JobFilters) -> List[Dict[str, Any]]:
+    return sort_rows(
+        filters.apply(Job.objects.all())
+        .values("company")
+        .annotate(count=Count("id"))
+        .order_by(),
+        COMPANY_ORDERING,
+    )
+
+
+@versioned_page(page_params)
+def technology_counts(request: HttpRequest) -> JsonResponse:
+    """Number of matching jobs mentioning each technology, by level."""
+    rows = cached_aggregate(
+        "api-technologies", JobFilters.from_request(request), technology_rows
+    )
+    return paginated_response(request, rows, TECHNOLOGY_ORDERING, dict)
+
+
+@versioned_page(page_params)
+def company_counts(request: HttpRequest) -> JsonResponse:
+    """Number of matching jobs of each company, most hiring first."""
+    rows = cached_aggregate(
+        "api-companies", JobFilters.from_request(request), company_rows
+    )
+    return paginated_response(request, rows, COMPANY_ORDERING, dict)
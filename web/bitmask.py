@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Iterable, List, TYPE_CHECKING
+
+import config
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bit positions follow the order of config.allowed_technologies_python,
+# which is why new technologies must only ever be appended to that list.
+TECHNOLOGIES: List[str] = list(config.allowed_technologies_python)
+TECHNOLOGY_BITS = {name: bit for bit, name in enumerate(TECHNOLOGIES)}
+
+# Job.technology_mask is a signed 64-bit column, keep the sign bit free
+assert len(TECHNOLOGIES) <= 63, "Too many technologies for a bigint mask"
+
+
+def technology_mask(names: Iterable[str]) -> int:
+    mask = 0
+    for name in names:
+        bit = TECHNOLOGY_BITS.get(name)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_technologies(mask: int) -> List[str]:
+    return [name for name, bit in TECHNOLOGY_BITS.items() if mask >> bit & 1]
+
+
+def match_masks(
+        masks: np.ndarray,
+        all_of: Iterable[str] = (),
+        any_of: Iterable[str] = (),
+) -> np.ndarray:
+    """
+    Returns a boolean array selecting the masks that contain every
+    technology of ``all_of`` and at least one of ``any_of``.
+    """
+    import numpy as np
+
+    selected = np.ones(len(masks), dtype=bool)
+    required = np.int64(technology_mask(all_of))
+    if required:
+        selected &= (masks & required) == required
+    optional = np.int64(technology_mask(any_of))
+    if optional:
+        selected &= (masks & optional) != 0
+    return selected
+
+
+def unpack_masks(masks: np.ndarray) -> np.ndarray:
+    """Expands masks into a (jobs, technologies) matrix of 0/1 values."""
+    import numpy as np
+
+    bits = np.arange(len(TECHNOLOGIES), dtype=np.int64)
+    return (masks[:, None] >> bits) & 1
+
+
+def cooccurrence_matrix(
+        masks: np.ndarray, counts: np.ndarray = None
+) -> np.ndarray:
+    """
+    Counts, for every pair of technologies, the jobs that mention both.
+    The diagonal holds the number of jobs per technology.
+
+    :param masks: Technology masks, ideally deduplicated
+    :param counts: Number of jobs sharing each mask (default: 1 each)
+    :return: A symmetric (technologies, technologies) matrix
+    """
+    import numpy as np
+
+    masks = np.asarray(masks, dtype=np.int64)
+    if counts is None:
+        masks, counts = np.unique(masks, return_counts=True)
+    bits = unpack_masks(masks)
+    return (bits * np.asarray(counts, dtype=np.int64)[:, None]).T @ bits
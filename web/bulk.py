@@ -0,0 +1,61 @@
+from typing import Iterable, Sequence
+
+from django.db import connection
+
+
+def quote_columns(columns: Sequence[str]) -> str:
+    return ", ".join(connection.ops.quote_name(column) for column in columns)
+
+
+def copy_rows(
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence],
+) -> int:
+    """
+    Streams rows into a table with Postgres ``COPY ... FROM STDIN``.
+
+    :param table: Name of the target table
+    :param columns: Column names, in the order of the values in each row
+    :param rows: Iterable of row tuples
+    :return: Number of rows written
+    """
+    statement = (
+        f"COPY {connection.ops.quote_name(table)} "
+        f"({quote_columns(columns)}) FROM STDIN"
+    )
+    written = 0
+    with connection.cursor() as cursor:
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
+                written += 1
+    return written
+
+
+def reserve_ids(table: str, count: int) -> int:
+    """
+    Reserves a contiguous block of primary keys from the table sequence,
+    so rows loaded with COPY can reference each other before they exist.
+
+    Must be called inside a transaction; the table stays locked against
+    concurrent writers until it commits.
+
+    :param table: Name of the table with a serial ``id`` column
+    :param count: Size of the block
+    :return: First id of the block
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {connection.ops.quote_name(table)} IN EXCLUSIVE MODE"
+        )
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id')", [table]
+        )
+        sequence = cursor.fetchone()[0]
+        cursor.execute("SELECT nextval(%s)", [sequence])
+        first_id = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT setval(%s, %s)", [sequence, first_id + count - 1]
+        )
+    return first_id
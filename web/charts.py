@@ -0,0 +1,268 @@
+from itertools import cycle
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+from bokeh.models import (
+    ColumnDataSource, FactorRange, HoverTool, CustomJS, TapTool, PanTool,
+    ColorBar
+)
+from bokeh.palettes import Spectral6, Spectral11, Blues256, Category10
+from bokeh.plotting import figure
+from bokeh.transform import factor_cmap, cumsum, linear_cmap
+
+
+def create_technology_plot(
+        tech_data: List[Dict[str, Any]], level: str
+) -> figure:
+    level_data: List[Dict[str, Any]] = list(
+        filter(lambda x: x["experience_level"] == level, tech_data)
+    )
+    if not level_data:
+        return None  # Return None if no data for this level
+
+    technologies: List[str] = [
+        tech["technologies__name"] for tech in level_data
+        if tech["technologies__name"] is not None
+    ]
+    counts: List[int] = [
+        tech["count"] for tech in level_data
+        if tech["technologies__name"] is not None
+    ]
+    source = ColumnDataSource(
+        data=dict(technologies=technologies, counts=counts),
+        name=f"technologies-{level}"
+    )
+
+    color_palette = cycle(Spectral11)
+    number_of_technologies: int = len(counts)
+    colors: List[str] = [
+        next(color_palette) for _ in range(number_of_technologies)
+    ]
+
+    p: figure = figure(
+        x_range=technologies,
+        height=800, width=1000,
+        title=f"{level} Level Technologies",
+        toolbar_location=None,
+        tools="",
+        tooltips=[("Count", "@counts")]
+    )
+    p.vbar(
+        x="technologies",
+        top="counts",
+        width=0.9,
+        source=source,
+        line_color="white",
+        fill_color=factor_cmap(
+            "technologies", palette=colors, factors=technologies
+        )
+    )
+
+    p.xgrid.grid_line_color = None
+    p.y_range.start = 0
+    p.xaxis.major_label_orientation = 1.2
+    return p
+
+
+def create_experience_plot(experience_df: pd.DataFrame) -> figure:
+    source_experience = ColumnDataSource(experience_df, name="experience")
+
+    p: figure = figure(
+        title="Розподіл вакансій за вимогами до досвіду роботи",
+        toolbar_location=None,
+        tools="",
+        width=1000,
+        tooltips=[("Count", "@count")]
+    )
+
+    p.wedge(
+        x=0,
+        y=1,
+        radius=0.4,
+        start_angle=cumsum("angle", include_zero=True),
+        end_angle=cumsum("angle"),
+        line_color="white",
+        fill_color="color",
+        legend_field="legend",
+        source=source_experience
+    )
+
+    p.axis.visible = False
+    p.grid.grid_line_color = None
+    p.legend.location = "top_left"
+    p.legend.orientation = "vertical"
+    return p
+
+
+def create_english_level_plot(english_level_df: pd.DataFrame) -> figure:
+    source_english = ColumnDataSource(english_level_df, name="english")
+    p: figure = figure(
+        x_range=english_level_df["english_level"],
+        title="English level",
+        toolbar_location=None,
+        tooltips=[("Count", "@count")],
+        tools="",
+        width=1000,
+        height=800
+    )
+
+    p.vbar(
+        x="english_level",
+        top="count",
+        width=0.9,
+        source=source_english,
+        line_color="white",
+        fill_color=factor_cmap(
+            "english_level",
+            palette=Spectral6,
+            factors=english_level_df["english_level"]
+        )
+    )
+
+    return p
+
+
+def create_company_plot(company_df: pd.DataFrame) -> figure:
+    unique_companies = company_df["company"].unique()
+    min_spacing = 20
+    plot_width = len(unique_companies) * min_spacing
+
+    x_factors: List[str] = company_df["company"].unique().tolist()
+    y_factors: List[str] = company_df["date_str"].unique().tolist()
+
+    # Names let live updates find the data and ranges on the page
+    source = ColumnDataSource(company_df, name="companies")
+    p: figure = figure(
+        x_range=FactorRange(*x_factors, name="companies-x"),
+        y_range=FactorRange(*y_factors, name="companies-y"),
+        width=plot_width,
+        height=800,
+        tools="xpan,xwheel_zoom",
+    )
+
+    p.add_tools(PanTool(dimensions="width"))
+
+    p.xaxis.major_label_orientation = 1.2
+    r = p.circle(x="company", y="date_str", size=10, source=source)
+
+    hover = HoverTool()
+    hover.tooltips = """
+        <div>
+            <h3>@company</h3>
+            <div><strong>Title: </strong>@title</div>
+            <div><strong>Date: </strong>@date_str</div>
+            <div><strong>URL: </strong><a href="@url" target="_blank">Link to Job</a></div>
+        </div>
+    """
+    p.add_tools(hover)
+
+    tap_cb = CustomJS(code='''
+        var urls = cb_data.source.data['url_all'][cb_data.source.inspected.indices[0]];
+        var urlList = urls.split(',');
+        for (var i = 0; i < urlList.length; i++) {
+            // Approximate rows stand for several jobs, without links
+            if (urlList[i]) {
+                window.open(urlList[i], '_blank');
+            }
+        }
+    ''')
+    tapt = TapTool(renderers=[r], callback=tap_cb, behavior='inspect')
+    p.add_tools(tapt)
+
+    return p
+
+
+def create_cooccurrence_plot(
+        technologies: List[str], matrix: np.ndarray
+) -> figure:
+    if not technologies:
+        return None
+
+    jobs_with_row: np.ndarray = matrix.diagonal()[:, None]
+    share = np.divide(
+        matrix, jobs_with_row,
+        out=np.zeros(matrix.shape), where=jobs_with_row > 0
+    )
+    rows, columns = np.indices(matrix.shape)
+    source = ColumnDataSource(data=dict(
+        row=[technologies[i] for i in rows.ravel()],
+        column=[technologies[i] for i in columns.ravel()],
+        count=matrix.ravel(),
+        share=(share.ravel() * 100).round(1),
+    ))
+
+    p: figure = figure(
+        x_range=technologies,
+        y_range=list(reversed(technologies)),
+        height=900, width=1000,
+        title="Технології, що зустрічаються разом",
+        toolbar_location=None,
+        tools="",
+        tooltips=[
+            ("Technologies", "@row + @column"),
+            ("Count", "@count"),
+            ("Share of @row jobs", "@share%"),
+        ]
+    )
+    mapper = linear_cmap(
+        "share", palette=Blues256[::-1], low=0, high=100
+    )
+    p.rect(
+        x="column", y="row", width=1, height=1,
+        source=source, line_color=None, fill_color=mapper
+    )
+    p.add_layout(ColorBar(color_mapper=mapper.transform), "right")
+
+    p.grid.grid_line_color = None
+    p.axis.major_tick_line_color = None
+    p.xaxis.major_label_orientation = 1.2
+    return p
+
+
+def create_technology_trend_plot(trends_df: pd.DataFrame) -> figure:
+    if trends_df.empty:
+        return None
+
+    technologies = [
+        column for column in trends_df.columns
+        if not column.endswith(" (avg)")
+    ]
+    p: figure = figure(
+        x_axis_type="datetime",
+        height=800, width=1000,
+        title="Частка вакансій з технологією, %",
+        toolbar_location=None,
+        tools="",
+    )
+    colors = cycle(Category10[10])
+    for technology in technologies:
+        color = next(colors)
+        source = ColumnDataSource(data=dict(
+            period=trends_df.index,
+            share=trends_df[technology].round(1),
+            average=trends_df[f"{technology} (avg)"].round(1),
+        ))
+        p.line(
+            x="period", y="share", source=source,
+            color=color, alpha=0.4, legend_label=technology
+        )
+        line = p.line(
+            x="period", y="average", source=source,
+            color=color, line_width=2, legend_label=technology
+        )
+        p.add_tools(HoverTool(
+            renderers=[line],
+            tooltips=[
+                ("Technology", technology),
+                ("Period", "@period{%F}"),
+                ("Share", "@share%"),
+                ("Moving average", "@average%"),
+            ],
+            formatters={"@period": "datetime"},
+        ))
+
+    p.y_range.start = 0
+    p.legend.location = "top_left"
+    p.legend.click_policy = "hide"
+    return p
@@ -0,0 +1,289 @@
+"""
+Single-flight crawls: each technology is crawled by one process at a
+time, which holds its lease and renews it until the crawl ends. A crawl
+requested for technologies already being crawled only crawls the
+others, and is counted as merged into the running one.
+
+Leases are taken in Redis and recorded in the database as well, so a
+process that can't reach Redis, and only leases in the database, still
+sees them, and a Redis lease is given up when the database one is held.
+"""
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CrawlLease, CrawlRun
+
+logger = logging.getLogger(__name__)
+
+LEASE_PREFIX = "crawl:lease:"
+
+# Compare-and-set on the token, so a process never renews or releases a
+# lease that expired and was taken over by another one
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_client = None
+
+
+def get_client():
+    global _client
+
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(
+            settings.CRAWL_LEASE_URL, socket_timeout=5,
+            socket_connect_timeout=5,
+        )
+    return _client
+
+
+def redis_errors() -> tuple:
+    from redis.exceptions import ConnectionError, TimeoutError
+
+    return ConnectionError, TimeoutError
+
+
+@dataclass
+class Lease:
+    name: str
+    token: str
+    # "redis" (recorded in the database too) or "database" alone
+    backend: str
+
+
+def acquire_lease(name: str, token: str, ttl: int) -> tuple[bool, str]:
+    """
+    Takes the lease ``name`` for ``ttl`` seconds if it is free.
+
+    :return: Whether it was taken, and the backend (on success) or the
+             holder's token (otherwise)
+    """
+    try:
+        taken, holder = acquire_redis_lease(name, token, ttl)
+    except redis_errors() as error:
+        logger.warning("Redis unreachable (%s), leasing %s in the database",
+                       error, name)
+        return acquire_database_lease(name, token, ttl)
+    if not taken:
+        return False, holder
+    # A process without Redis may hold it in the database alone
+    taken, holder = acquire_database_lease(name, token, ttl)
+    if not taken:
+        release_redis_lease(name, token)
+        return False, holder
+    return True, "redis"
+
+
+def acquire_redis_lease(name: str, token: str, ttl: int) -> tuple[bool, str]:
+    client = get_client()
+    key = LEASE_PREFIX + name
+    if client.set(key, token, nx=True, ex=ttl):
+        return True, token
+    holder = client.get(key)
+    if holder is None:
+        # Expired in between, try once more
+        if client.set(key, token, nx=True, ex=ttl):
+            return True, token
+        holder = client.get(key) or b""
+    return False, holder.decode()
+
+
+def acquire_database_lease(name: str, token: str, ttl: int) -> tuple[bool, str]:
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    try:
+        with transaction.atomic():
+            lease, created = CrawlLease.objects.select_for_update().get_or_create(
+                name=name, defaults={"token": token, "expires_at": expires_at}
+            )
+            if created or lease.expires_at <= now:
+                lease.token = token
+                lease.expires_at = expires_at
+                lease.save()
+                return True, "database"
+            return False, lease.token
+    except IntegrityError:
+        # Created by another process meanwhile
+        return False, CrawlLease.objects.get(name=name).token
+
+
+def renew_lease(lease: Lease, ttl: int) -> bool:
+    # The database lease alone keeps other processes off the technology
+    renewed = bool(CrawlLease.objects.filter(
+        name=lease.name, token=lease.token
+    ).update(expires_at=timezone.now() + timedelta(seconds=ttl)))
+    if lease.backend == "redis":
+        try:
+            get_client().eval(
+                RENEW_SCRIPT, 1, LEASE_PREFIX + lease.name, lease.token,
+                ttl * 1000,
+            )
+        except redis_errors():
+            logger.warning("Could not renew the Redis lease of %s", lease.name)
+    return renewed
+
+
+def release_redis_lease(name: str, token: str) -> None:
+    try:
+        get_client().eval(RELEASE_SCRIPT, 1, LEASE_PREFIX + name, token)
+    except redis_errors():
+        # Expires on its own
+        logger.warning("Could not release the Redis lease of %s", name)
+
+
+def release_lease(lease: Lease) -> None:
+    if lease.backend == "redis":
+        release_redis_lease(lease.name, lease.token)
+    CrawlLease.objects.filter(name=lease.name, token=lease.token).delete()
+
+
+def holder_run(token: str) -> Optional[CrawlRun]:
+    run_id, _, _ = token.partition(":")
+    if not run_id.isdigit():
+        return None
+    return CrawlRun.objects.filter(pk=int(run_id)).first()
+
+
+def expire_dead_runs(ttl: int) -> int:
+    """Marks the running crawls that stopped renewing their leases."""
+    return CrawlRun.objects.filter(
+        status=CrawlRun.RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=ttl),
+    ).update(
+        status=CrawlRun.FAILED,
+        finished_at=F("heartbeat_at"),
+        error="Stopped renewing its leases",
+    )
+
+
+@dataclass
+class Crawl:
+    run: Optional[CrawlRun]
+    leases: List[Lease] = field(default_factory=list)
+    # Technology -> the running crawl it was merged into (None if its
+    # holder can't be found, e.g. a run recorded by another database)
+    merged: Dict[str, Optional[CrawlRun]] = field(default_factory=dict)
+    # Crawler stats, filled in by the caller
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def technologies(self) -> List[str]:
+        return [lease.name for lease in self.leases]
+
+
+class Heartbeat(threading.Thread):
+    """Renews the leases of a crawl until it is stopped."""
+
+    def __init__(self, crawl: Crawl, ttl: int):
+        super().__init__(name="crawl-heartbeat", daemon=True)
+        self.crawl = crawl
+        self.ttl = ttl
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.ttl / 3):
+            try:
+                for lease in self.crawl.leases:
+                    if not renew_lease(lease, self.ttl):
+                        logger.warning(
+                            "Lost the lease of %s, another crawl may start",
+                            lease.name
+                        )
+                CrawlRun.objects.filter(pk=self.crawl.run.pk).update(
+                    heartbeat_at=timezone.now()
+                )
+            except Exception:
+                logger.exception("Could not renew the crawl leases")
+            finally:
+                connection.close()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def start_crawl(technologies: List[str], ttl: int) -> Crawl:
+    expire_dead_runs(ttl)
+    run = CrawlRun.objects.create()
+    crawl = Crawl(run)
+    prefix = f"{run.pk}:{uuid.uuid4().hex}"
+    for technology in sorted(set(technologies)):
+        taken, result = acquire_lease(technology, prefix, ttl)
+        if taken:
+            crawl.leases.append(Lease(technology, prefix, result))
+            continue
+        holder = holder_run(result)
+        crawl.merged[technology] = holder
+        if holder is not None:
+            CrawlRun.objects.filter(pk=holder.pk).update(
+                merged_requests=F("merged_requests") + 1
+            )
+    if crawl.leases:
+        run.technologies = crawl.technologies
+        run.save(update_fields=["technologies"])
+    else:
+        # Nothing left to crawl, the request only joined running crawls
+        run.delete()
+        crawl.run = None
+    return crawl
+
+
+def finish_crawl(crawl: Crawl, error: Optional[BaseException]) -> None:
+    run, stats = crawl.run, crawl.stats
+    run.status = CrawlRun.FAILED if error else CrawlRun.SUCCEEDED
+    run.error = repr(error) if error else ""
+    run.finished_at = timezone.now()
+    run.items_scraped = stats.get("item_scraped_count", 0)
+    run.jobs_created = stats.get("jobs_created", 0)
+    # merged_requests is counted by the other runs meanwhile
+    run.save(update_fields=[
+        "status", "error", "finished_at", "items_scraped", "jobs_created",
+    ])
+    for lease in crawl.leases:
+        release_lease(lease)
+
+
+@contextmanager
+def single_flight_crawl(technologies: List[str]) -> Iterator[Crawl]:
+    """
+    Leases the technologies nobody is crawling and records the run.
+    The caller crawls ``crawl.technologies`` (possibly none) and puts
+    the crawler stats in ``crawl.stats``, the run is finished on exit.
+    """
+    ttl = settings.CRAWL_LEASE_TTL
+    crawl = start_crawl(technologies, ttl)
+    if crawl.run is None:
+        yield crawl
+        return
+    heartbeat = Heartbeat(crawl, ttl)
+    heartbeat.start()
+    error = None
+    try:
+        yield crawl
+    except BaseException as exception:
+        error = exception
+        raise
+    finally:
+        heartbeat.stop()
+        finish_crawl(crawl, error)
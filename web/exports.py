@@ -0,0 +1,230 @@
+import csv
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+
+from .filters import JobFilters, experience_level_case
+from .models import Job, Technology
+
+CHUNK_SIZE = 2000
+
+JOB_COLUMNS = [
+    "id", "date", "title", "company", "url", "english", "experience",
+    "technologies",
+]
+STATISTICS_COLUMNS = ["statistic", "experience_level", "key", "count"]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class Echo:
+    """An object that implements just the write method of a file."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class ChunkSink:
+    """A file-like object that buffers writes until they are drained."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def iterate_in_sync_thread(chunks: Iterator) -> AsyncIterator:
+    """
+    Runs ``chunks`` one chunk at a time in the request's sync thread,
+    where its database cursor lives. Under ASGI, Django 4.2 would
+    otherwise read a sync streaming iterator to the end before sending
+    the first byte.
+    """
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def job_rows(
+        filters: JobFilters, fields: Iterable[str] = tuple(JOB_COLUMNS[:-1])
+) -> Iterator[tuple]:
+    """Yields job rows with the sorted technology names appended."""
+    return (
+        filters.apply(Job.objects.all())
+        .order_by("id")
+        .values_list(*fields)
+        # A subquery rather than an aggregate: grouping by the job id alone
+        # isn't valid on the partitioned table, whose key is (id, date)
+        .annotate(technologies=ArraySubquery(
+            Technology.objects.filter(jobs=OuterRef("pk"))
+            .order_by("name")
+            .values("name")
+        ))
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def statistics_rows(filters: JobFilters) -> Iterator[tuple]:
+    jobs = filters.apply(Job.objects.all())
+    technologies = (
+        jobs.filter(technologies__isnull=False)
+        .annotate(experience_level=experience_level_case())
+        .values_list("experience_level", "technologies__name")
+        .annotate(count=Count("technologies"))
+        .order_by("experience_level", "technologies__name")
+    )
+    for level, name, count in technologies.iterator(chunk_size=CHUNK_SIZE):
+        yield "technology", level, name, count
+
+    for statistic, field in (
+            ("experience", "experience"),
+            ("english", "english"),
+            ("company", "company"),
+    ):
+        counts = (
+            jobs.values_list(field)
+            .annotate(count=Count("id"))
+            .order_by("-count", field)
+        )
+        for key, count in counts.iterator(chunk_size=CHUNK_SIZE):
+            yield statistic, "", key, count
+
+
+def stream_csv(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            [",".join(value) if isinstance(value, list) else value
+             for value in row]
+        )
+
+
+def stream_arrow(
+        schema, rows: Iterable[tuple], file_format: str
+) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = ChunkSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for chunk in chunked(rows, CHUNK_SIZE):
+        columns = list(zip(*chunk))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type)
+             for column, field in zip(columns, schema)],
+            schema=schema,
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def job_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("title", pa.string()),
+        ("company", pa.string()),
+        ("url", pa.string()),
+        ("english", pa.string()),
+        ("experience", pa.int64()),
+        ("technologies", pa.list_(pa.string())),
+    ])
+
+
+def statistics_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("statistic", pa.string()),
+        ("experience_level", pa.string()),
+        ("key", pa.string()),
+        ("count", pa.int64()),
+    ])
+
+
+def streaming_response(
+        request: HttpRequest,
+        file_format: str,
+        name: str,
+        columns: list[str],
+        schema_factory,
+        rows: Iterable[tuple],
+) -> StreamingHttpResponse:
+    if file_format not in CONTENT_TYPES:
+        raise Http404(f"Unsupported export format: {file_format}")
+    if file_format == "csv":
+        # A line per chunk would be a message, and a thread hop, per row
+        content = (
+            "".join(lines)
+            for lines in chunked(stream_csv(columns, rows), CHUNK_SIZE)
+        )
+    else:
+        content = stream_arrow(schema_factory(), rows, file_format)
+    if isinstance(request, ASGIRequest):
+        content = iterate_in_sync_thread(content)
+    response = StreamingHttpResponse(
+        content, content_type=CONTENT_TYPES[file_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{file_format}"'
+    )
+    return response
+
+
+def export_jobs(request: HttpRequest, file_format: str) -> Any:
+    filters = JobFilters.from_request(request)
+    return streaming_response(
+        request, file_format, "jobs", JOB_COLUMNS, job_schema, job_rows(filters)
+    )
+
+
+def export_statistics(request: HttpRequest, file_format: str) -> Any:
+    filters = JobFilters.from_request(request)
+    return streaming_response(
+        request, file_format, "statistics", STATISTICS_COLUMNS, statistics_schema,
+        (tuple(map(str, row[:3])) + row[3:]
+         for row in statistics_rows(filters))
+    )
@@ -0,0 +1,175 @@
+import dataclasses
+import hashlib
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from django.db.models import Case, CharField, F, Q, QuerySet, Value, When
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.db.models.lookups import Exact, GreaterThan
+from django.http import HttpRequest
+
+from .bitmask import TECHNOLOGY_BITS, technology_mask
+
+EXPERIENCE_LEVELS = {
+    "Junior": {"experience__in": [0, 1]},
+    "Middle": {"experience__in": [2, 3]},
+    "Senior": {"experience__gte": 5},
+}
+OTHER_LEVEL = "Other"
+
+TREND_PERIODS = {"week": TruncWeek, "month": TruncMonth}
+
+
+def experience_level_case() -> Case:
+    return Case(
+        *[When(**lookup, then=Value(level))
+          for level, lookup in EXPERIENCE_LEVELS.items()],
+        default=Value(OTHER_LEVEL),
+        output_field=CharField(),
+    )
+
+
+def experience_level(years: int) -> str:
+    if years in (0, 1):
+        return "Junior"
+    if years in (2, 3):
+        return "Middle"
+    if years >= 5:
+        return "Senior"
+    return OTHER_LEVEL
+
+
+def experience_level_q(level: str, prefix: str = "") -> Q:
+    if level == OTHER_LEVEL:
+        q = Q()
+        for other in EXPERIENCE_LEVELS:
+            q |= experience_level_q(other, prefix)
+        return ~q
+    return Q(**{
+        f"{prefix}{lookup}": value
+        for lookup, value in EXPERIENCE_LEVELS[level].items()
+    })
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_technologies(values: list[str]) -> tuple[str, ...]:
+    return tuple(sorted(set(values) & TECHNOLOGY_BITS.keys()))
+
+
+def parse_levels(values: list[str]) -> tuple[str, ...]:
+    return tuple(sorted(set(values) & {*EXPERIENCE_LEVELS, OTHER_LEVEL}))
+
+
+def parse_strings(values: list[str]) -> tuple[str, ...]:
+    return tuple(sorted({value.strip() for value in values if value.strip()}))
+
+
+def parse_ints(values: list[str]) -> tuple[int, ...]:
+    parsed = set()
+    for value in values:
+        try:
+            parsed.add(int(value))
+        except ValueError:
+            continue
+    return tuple(sorted(parsed))
+
+
+@dataclass(frozen=True)
+class JobFilters:
+    """
+    Filters shared by the dashboard and the exports. Every value is
+    normalized (sorted, deduplicated), so equal filters compare and
+    hash equal no matter how the query string was written.
+    """
+
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    experience: tuple[int, ...] = ()
+    levels: tuple[str, ...] = ()
+    english: tuple[str, ...] = ()
+    # Jobs must mention all of ``technologies`` and any of ``any_technologies``
+    technologies: tuple[str, ...] = ()
+    any_technologies: tuple[str, ...] = ()
+
+    @classmethod
+    def from_request(cls, request: HttpRequest) -> "JobFilters":
+        return cls(
+            date_from=parse_date(request.GET.get("date_from")),
+            date_to=parse_date(request.GET.get("date_to")),
+            experience=parse_ints(request.GET.getlist("experience")),
+            levels=parse_levels(request.GET.getlist("level")),
+            english=parse_strings(request.GET.getlist("english")),
+            technologies=parse_technologies(
+                request.GET.getlist("technology")
+            ),
+            any_technologies=parse_technologies(
+                request.GET.getlist("any_technology")
+            ),
+        )
+
+    def __bool__(self) -> bool:
+        return self != JobFilters()
+
+    def cache_key(self) -> str:
+        parts = [
+            f"{field.name}={getattr(self, field.name)!r}"
+            for field in dataclasses.fields(self)
+            if getattr(self, field.name)
+        ]
+        if not parts:
+            return "all"
+        return hashlib.md5("&".join(parts).encode()).hexdigest()
+
+    def to_q(self, prefix: str = "") -> Q:
+        q = Q()
+        if self.date_from:
+            q &= Q(**{f"{prefix}date__gte": self.date_from})
+        if self.date_to:
+            q &= Q(**{f"{prefix}date__lte": self.date_to})
+        if self.experience:
+            q &= Q(**{f"{prefix}experience__in": self.experience})
+        if self.levels:
+            levels_q = Q()
+            for level in self.levels:
+                levels_q |= experience_level_q(level, prefix)
+            q &= levels_q
+        if self.english:
+            q &= Q(**{f"{prefix}english__in": self.english})
+        mask = F(f"{prefix}technology_mask")
+        if self.technologies:
+            required = technology_mask(self.technologies)
+            q &= Q(Exact(mask.bitand(required), required))
+        if self.any_technologies:
+            optional = technology_mask(self.any_technologies)
+            q &= Q(GreaterThan(mask.bitand(optional), 0))
+        return q
+
+    def matches(self, job: dict) -> bool:
+        """Applies the filters to a single job, e.g. a live update."""
+        if self.date_from and job["date"] < self.date_from:
+            return False
+        if self.date_to and job["date"] > self.date_to:
+            return False
+        if self.experience and job["experience"] not in self.experience:
+            return False
+        level = experience_level(job["experience"])
+        if self.levels and level not in self.levels:
+            return False
+        if self.english and job["english"] not in self.english:
+            return False
+        mask = job["technology_mask"]
+        required = technology_mask(self.technologies)
+        if mask & required != required:
+            return False
+        optional = technology_mask(self.any_technologies)
+        return not optional or bool(mask & optional)
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        return queryset.filter(self.to_q())
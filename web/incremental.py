@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+from django.conf import settings
+
+from .exports import chunked
+from .filters import JobFilters
+from .models import Job
+from .snapshot import load_snapshot, filter_snapshot
+
+# Rough size of one job row (date, company, url, title, ...) in a pandas
+# chunk, object overhead included
+ROW_BYTES = 512
+
+
+class MemoryCeilingExceeded(MemoryError):
+    pass
+
+
+def chunk_size() -> int:
+    # A chunk may use a quarter of the ceiling, the rest is left to the
+    # counters and to the rows kept for the result
+    return max(1000, settings.DASHBOARD_MEMORY_CEILING // 4 // ROW_BYTES)
+
+
+def iter_job_frames(
+        filters: JobFilters, columns: List[str]
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the filtered jobs ordered by id, ``chunk_size()`` rows at a
+    time, from the snapshot when it is fresh and from Postgres otherwise.
+    At least one (maybe empty) frame is yielded, with the source dtypes.
+    """
+    size = chunk_size()
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        table = filter_snapshot(snapshot, filters).select(columns)
+        if not table.num_rows:
+            yield table.to_pandas()
+        for batch in table.to_batches(max_chunksize=size):
+            yield batch.to_pandas()
+        return
+    rows = (
+        filters.apply(Job.objects.order_by("id"))
+        .values_list(*columns)
+        .iterator(chunk_size=size)
+    )
+    empty = True
+    for chunk in chunked(rows, size):
+        empty = False
+        yield pd.DataFrame(chunk, columns=columns)
+    if empty:
+        yield pd.DataFrame([], columns=columns)
+
+
+def value_counts(filters: JobFilters, column: str) -> pd.Series:
+    """
+    Same result as ``frame[column].value_counts()`` over every filtered
+    job: pandas orders equal counts by first appearance too, so sorting
+    the folded counts the same way gives an identical Series.
+    """
+    # Insertion order keeps the order of first appearance
+    counts: Dict[Any, int] = {}
+    for frame in iter_job_frames(filters, [column]):
+        dtype = frame[column].dtype
+        for value, count in frame[column].value_counts(sort=False).items():
+            counts[value] = counts.get(value, 0) + count
+    return pd.Series(
+        list(counts.values()),
+        index=pd.Index(list(counts), name=column, dtype=dtype),
+        name="count",
+        dtype="int64",
+    ).sort_values(ascending=False)
+
+
+def company_points(filters: JobFilters, min_vacancies: int) -> pd.DataFrame:
+    """
+    Same result as ``aggregates.company_points`` over the jobs of the
+    companies with at least ``min_vacancies`` jobs. Companies are counted
+    in a first pass, and the second one folds their jobs into one title
+    and URL list per (company, date) as they stream by.
+    """
+    counts = value_counts(filters, "company")
+    companies = counts[counts >= min_vacancies].index
+    ceiling = settings.DASHBOARD_MEMORY_CEILING
+    # (company, date) -> (titles, urls). Jobs come in id order, so points
+    # are inserted in the order of their first job
+    points: Dict[tuple, tuple[List[str], List[str]]] = {}
+    used = 0
+    for frame in iter_job_frames(filters, ["date", "company", "title", "url"]):
+        date_dtype = frame["date"].dtype
+        frame = frame[frame["company"].isin(companies)]
+        used += frame.memory_usage(deep=True).sum()
+        if used > ceiling:
+            raise MemoryCeilingExceeded(
+                f"Jobs of companies with {min_vacancies}+ vacancies "
+                f"take more than {ceiling} bytes"
+            )
+        grouped = frame.groupby(["company", "date"], sort=False).agg(
+            title=("title", list), url=("url", list)
+        )
+        for key, titles, urls in zip(
+                grouped.index, grouped["title"], grouped["url"]
+        ):
+            point_titles, point_urls = points.setdefault(key, ([], []))
+            point_titles.extend(titles)
+            point_urls.extend(urls)
+
+    keys = list(points)
+    dates = pd.Series([day for _, day in keys], dtype=date_dtype)
+    result = pd.DataFrame({
+        "company": pd.Series([company for company, _ in keys], dtype=object),
+        "date_str": dates.apply(lambda day: day.strftime("%Y-%m-%d")),
+        "date": dates,
+        "title": ["; ".join(titles) for titles, _ in points.values()],
+        "url": [urls[0] for _, urls in points.values()],
+        "url_all": [",".join(urls) for _, urls in points.values()],
+        "jobs": [len(urls) for _, urls in points.values()],
+    })
+    # Ordered by date, then by first job, as the chart expects
+    return result.sort_values(
+        "date", kind="stable", ignore_index=True
+    )
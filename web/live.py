@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterable
+
+from django.conf import settings
+from django.http import HttpRequest, StreamingHttpResponse
+
+from .bitmask import technology_mask
+from .filters import JobFilters, experience_level
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "jobs:updates"
+# Seconds between comments that keep idle connections (and proxies) open
+KEEPALIVE = 15
+# Django 4.2 doesn't stop a stream when its client goes away, so each
+# stream ends after this many seconds and EventSource reconnects. A
+# closed tab holds its task and Redis connection for at most this long
+STREAM_LIFETIME = 300
+
+_client = None
+
+
+def get_client():
+    global _client
+
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(settings.LIVE_UPDATES_URL)
+    return _client
+
+
+def job_event(job, technologies: Iterable[str]) -> Dict[str, Any]:
+    technologies = sorted(set(technologies))
+    # A job fresh from the pipeline still holds the item's years as text
+    experience = int(job.experience)
+    return {
+        "date": str(job.date),
+        "company": job.company,
+        "title": job.title,
+        "url": job.url,
+        "english": job.english,
+        "experience": experience,
+        "level": experience_level(experience),
+        "technologies": technologies,
+        "technology_mask": technology_mask(technologies),
+    }
+
+
+def publish_job(job, technologies: Iterable[str]) -> None:
+    """Announces a newly stored job to the dashboards watching the crawl."""
+    try:
+        get_client().publish(
+            CHANNEL, json.dumps(job_event(job, technologies))
+        )
+    except Exception:
+        # Live updates are a convenience, never lose the job over them
+        logger.exception("Could not publish a live update")
+
+
+async def job_events(filters: JobFilters) -> AsyncIterator[str]:
+    import redis.asyncio
+
+    client = redis.asyncio.Redis.from_url(settings.LIVE_UPDATES_URL)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_LIFETIME
+    try:
+        yield "retry: 5000\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=min(KEEPALIVE, remaining),
+            )
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            event = json.loads(message["data"])
+            if filters.matches({
+                **event, "date": date.fromisoformat(event["date"])
+            }):
+                yield f"data: {json.dumps(event)}\n\n"
+    finally:
+        await pubsub.unsubscribe(CHANNEL)
+        await pubsub.aclose()
+        await client.aclose()
+
+
+async def job_updates(request: HttpRequest) -> StreamingHttpResponse:
+    """
+    Server-sent events with every new job matching the dashboard
+    filters, for the page to patch its charts in place. Each stream
+    lasts ``STREAM_LIFETIME`` seconds, the browser then reconnects.
+    """
+    response = StreamingHttpResponse(
+        job_events(JobFilters.from_request(request)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stops nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,121 @@
+import io
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from web.models import Job
+
+
+def request_dashboard(url: str, min_vacancies: int) -> tuple[float, int]:
+    client = Client()
+    # The request_started signal clears the log, start from an empty one
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(url, {"min_vacancies": min_vacancies})
+        elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f"Dashboard returned {response.status_code}")
+    return elapsed, len(queries)
+
+
+def request_dashboard_in_thread(
+        url: str, min_vacancies: int
+) -> tuple[float, int]:
+    # Client threads open their own connections, close them when done
+    try:
+        return request_dashboard(url, min_vacancies)
+    finally:
+        connections.close_all()
+
+
+def measure_peak_memory(url: str, min_vacancies: int) -> int:
+    tracemalloc.start()
+    try:
+        request_dashboard(url, min_vacancies)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+class Command(BaseCommand):
+    help = "Measure dashboard latency, memory and queries under load"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[],
+            help="Dataset sizes to generate and benchmark "
+                 "(default: benchmark the current data)"
+        )
+        parser.add_argument(
+            "--min-vacancies",
+            nargs="+",
+            type=int,
+            default=[1, 3, 10],
+            help="min_vacancies values to request"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Number of requests per min_vacancies value"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of concurrent clients"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for the generated datasets"
+        )
+
+    def handle(self, *args, **options):
+        url = reverse("index")
+        sizes = options["sizes"] or [None]
+        self.stdout.write(
+            f"{'jobs':>9} {'min_vac':>7} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'peak MiB':>9} {'queries':>7}"
+        )
+        for size in sizes:
+            if size is not None:
+                call_command(
+                    "generatejobs", size,
+                    flush=True, seed=options["seed"], verbosity=0,
+                    stdout=io.StringIO()
+                )
+            jobs_count = Job.objects.count()
+            for min_vacancies in options["min_vacancies"]:
+                # The first request warms up caches and lazy imports
+                request_dashboard(url, min_vacancies)
+                with ThreadPoolExecutor(options["concurrency"]) as executor:
+                    results = list(executor.map(
+                        lambda _: request_dashboard_in_thread(
+                            url, min_vacancies
+                        ),
+                        range(options["requests"])
+                    ))
+                latencies = np.array([elapsed for elapsed, _ in results])
+                queries = max(count for _, count in results)
+                p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+                peak = measure_peak_memory(url, min_vacancies)
+                self.stdout.write(
+                    f"{jobs_count:>9} {min_vacancies:>7} {p50:>9.1f} "
+                    f"{p95:>9.1f} {p99:>9.1f} {peak / 2 ** 20:>9.1f} "
+                    f"{queries:>7}"
+                )
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from web.sketches import rebuild_sketches
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-day job sketches of the approximate dashboard "
+        "from the jobs, e.g. after enabling it on existing data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date-from",
+            type=date.fromisoformat,
+            default=None,
+            help="First day to rebuild (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--date-to",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day to rebuild (YYYY-MM-DD)"
+        )
+
+    def handle(self, *args, **options):
+        days = rebuild_sketches(options["date_from"], options["date_to"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {days} days"))
@@ -0,0 +1,91 @@
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from web.partitions import (
+    add_months, archive_month, compact_month, ensure_partitions,
+    job_partitions, lock_partition
+)
+from web.snapshot import write_snapshot
+from web.versioning import bump_data_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming job partitions, then archive the months past "
+        "the retention to Parquet and keep only their counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=settings.JOB_RETENTION_MONTHS,
+            help=(
+                "Number of months, the current one included, kept in full, "
+                "0 keeps every month"
+            )
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.JOB_ARCHIVE_DIR,
+            help="Directory of the archived Parquet files"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the months that would be archived"
+        )
+
+    def handle(self, *args, **options):
+        if options["keep_months"] < 0:
+            raise CommandError("--keep-months should not be negative")
+        if not options["dry_run"]:
+            with transaction.atomic():
+                created = ensure_partitions(
+                    settings.JOB_PARTITION_MONTHS_AHEAD
+                )
+            for month in created:
+                self.stdout.write(f"Created the partition of {month:%Y-%m}")
+        if not options["keep_months"]:
+            self.stdout.write("No retention set, every month is kept")
+            return
+
+        oldest_kept = add_months(
+            date.today().replace(day=1), 1 - options["keep_months"]
+        )
+        expired = sorted(
+            month for month in job_partitions() if month < oldest_kept
+        )
+        if options["dry_run"]:
+            for month in expired:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+            return
+
+        directory = Path(options["archive_dir"])
+        for month in expired:
+            with transaction.atomic():
+                lock_partition(month)
+                # The file is complete before any row is deleted
+                path, written = archive_month(month, directory)
+                removed = compact_month(month)
+            if removed != written:
+                self.stderr.write(
+                    f"{month:%Y-%m}: archived {written} jobs "
+                    f"but removed {removed}"
+                )
+            self.stdout.write(
+                f"Archived {removed} jobs of {month:%Y-%m} to {path}"
+            )
+        if expired:
+            bump_data_version()
+            # The old snapshot still holds the archived jobs, which the
+            # monthly rollups would count a second time
+            written = write_snapshot()
+            self.stdout.write(f"Wrote a snapshot of {written} jobs")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {len(expired)} months, kept {oldest_kept:%Y-%m} on"
+        ))
@@ -0,0 +1,204 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+import config
+from web.bitmask import TECHNOLOGY_BITS
+from web.bulk import copy_rows, reserve_ids
+from web.models import Job, JobDaySketch, Technology
+from web.sketches import rebuild_sketches
+from web.versioning import bump_data_version
+
+ENGLISH_LEVELS = [
+    ("Not Specified", 0.25),
+    ("Початковий", 0.04),
+    ("Нижче середнього", 0.08),
+    ("Середній", 0.25),
+    ("Вище середнього", 0.28),
+    ("Просунутий", 0.08),
+    ("Вільно", 0.02),
+]
+
+# The only values Djinni offers, see DjinniSpider._parse_years_of_experience
+EXPERIENCE_YEARS = [
+    (0, 0.1),
+    (1, 0.2),
+    (2, 0.25),
+    (3, 0.25),
+    (5, 0.2),
+]
+
+TITLES = [
+    "Python Developer",
+    "Python Engineer",
+    "Backend Developer (Python)",
+    "Django Developer",
+    "Data Engineer",
+    "ML Engineer",
+    "Full Stack Developer",
+    "Python Team Lead",
+]
+
+TITLE_PREFIXES = ["", "Junior ", "Middle ", "Senior ", "Strong Middle "]
+
+JOB_COLUMNS = [
+    "id", "date", "title", "company", "url", "english", "experience",
+    "technology_mask",
+]
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a synthetic dataset of job postings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "count",
+            type=int,
+            help="Number of jobs to generate"
+        )
+        parser.add_argument(
+            "--companies",
+            type=int,
+            default=None,
+            help="Number of distinct companies (default: count / 20)"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=730,
+            help="Length of the posting history in days"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50_000,
+            help="Number of jobs generated and copied at once"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Random seed, for reproducible datasets"
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete all existing jobs first"
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        if count < 1:
+            raise CommandError("count should be a positive number")
+        rng = np.random.default_rng(options["seed"])
+        companies = self.make_companies(
+            options["companies"] or max(1, count // 20), rng
+        )
+        technology_ids = self.ensure_technologies()
+        # Each technology is mentioned by its own share of the postings
+        popularity = rng.uniform(0.03, 0.6, len(technology_ids))
+
+        with transaction.atomic():
+            if options["flush"]:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"TRUNCATE {Job._meta.db_table}, "
+                        f"{Job.technologies.through._meta.db_table}"
+                    )
+                JobDaySketch.objects.all().delete()
+            first_id = reserve_ids(Job._meta.db_table, count)
+            batch_size = options["batch_size"]
+            for offset in range(0, count, batch_size):
+                size = min(batch_size, count - offset)
+                jobs, links = self.make_batch(
+                    first_id + offset, size, companies,
+                    technology_ids, popularity, options["days"], rng
+                )
+                copy_rows(Job._meta.db_table, JOB_COLUMNS, jobs)
+                copy_rows(
+                    Job.technologies.through._meta.db_table,
+                    ["job_id", "technology_id"],
+                    links
+                )
+                self.stdout.write(f"Generated {offset + size}/{count} jobs")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Job._meta.db_table}")
+        rebuild_sketches(date.today() - timedelta(days=options["days"]))
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Generated {count} jobs"))
+
+    @staticmethod
+    def ensure_technologies() -> dict[str, int]:
+        Technology.objects.bulk_create(
+            [Technology(name=name)
+             for name in config.allowed_technologies_python],
+            ignore_conflicts=True
+        )
+        return dict(
+            Technology.objects.filter(
+                name__in=config.allowed_technologies_python
+            ).values_list("name", "id")
+        )
+
+    @staticmethod
+    def make_companies(count: int, rng: np.random.Generator) -> tuple:
+        names = np.array([f"Company {i:05d}" for i in range(count)])
+        # A handful of companies post most of the vacancies
+        weights = 1 / np.arange(1, count + 1) ** 1.1
+        rng.shuffle(names)
+        return names, weights / weights.sum()
+
+    @staticmethod
+    def make_batch(
+            first_id: int,
+            size: int,
+            companies: tuple,
+            technology_ids: dict[str, int],
+            popularity: np.ndarray,
+            days: int,
+            rng: np.random.Generator,
+    ) -> tuple[list, list]:
+        company_names, company_weights = companies
+        english_values, english_weights = zip(*ENGLISH_LEVELS)
+        experience_values, experience_weights = zip(*EXPERIENCE_YEARS)
+
+        today = date.today()
+        # Skew towards recent dates, the way the crawl history grows
+        offsets = (days * rng.power(0.7, size)).astype(int)
+        picked_companies = rng.choice(
+            company_names, size=size, p=company_weights
+        )
+        picked_english = rng.choice(
+            english_values, size=size, p=english_weights
+        )
+        picked_experience = rng.choice(
+            experience_values, size=size, p=experience_weights
+        )
+        picked_titles = rng.integers(0, len(TITLES), size)
+        picked_prefixes = rng.integers(0, len(TITLE_PREFIXES), size)
+
+        names = list(technology_ids)
+        has_technology = rng.random((size, len(names))) < popularity
+        bits = np.array([TECHNOLOGY_BITS[name] for name in names])
+        masks = (has_technology.astype(np.int64) << bits).sum(axis=1)
+
+        jobs = []
+        links = []
+        for i in range(size):
+            job_id = first_id + i
+            jobs.append((
+                job_id,
+                today - timedelta(days=int(offsets[i])),
+                TITLE_PREFIXES[picked_prefixes[i]] + TITLES[picked_titles[i]],
+                str(picked_companies[i]),
+                f"https://djinni.co/jobs/{job_id}-synthetic/",
+                str(picked_english[i]),
+                int(picked_experience[i]),
+                int(masks[i]),
+            ))
+            for column in np.flatnonzero(has_technology[i]):
+                links.append((job_id, technology_ids[names[column]]))
+        return jobs, links
@@ -0,0 +1,236 @@
+import csv
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Iterator, Dict, Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Field
+
+from web.bitmask import technology_mask
+from web.bulk import copy_rows
+from web.models import Job, Technology
+from web.sketches import rebuild_sketches
+from web.versioning import bump_data_version
+
+STAGE_COLUMNS = [
+    "n", "date", "title", "company", "url", "english", "experience",
+    "technology_mask",
+]
+NATURAL_KEY = ["date", "title", "company", "english", "experience"]
+
+
+def open_feed(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_feed(
+        path: Path, feed_format: str
+) -> Iterator[Optional[Dict[str, Any]]]:
+    with open_feed(path) as feed:
+        if feed_format == "csv":
+            for row in csv.DictReader(feed):
+                # The CSV exporter joins list fields with commas
+                row["technologies"] = [
+                    tech for tech in (row.get("technologies") or "").split(",")
+                    if tech
+                ]
+                yield row
+        else:
+            for line in feed:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Counted as skipped, like any other invalid item
+                    yield None
+
+
+def clean_value(field: Field, value: Any) -> Any:
+    """
+    Converts a feed value like ``field`` and checks the column can hold
+    it, so a bad item is skipped rather than failing its batch's COPY.
+    """
+    value = field.to_python(value)
+    if value is None:
+        raise ValidationError(f"{field.name} is missing")
+    field.run_validators(value)
+    return value
+
+
+def guess_format(path: Path) -> str:
+    suffixes = [suffix for suffix in path.suffixes if suffix != ".gz"]
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    return "jsonl"
+
+
+class Command(BaseCommand):
+    help = "Bulk import a JSONL/CSV feed export of JobItems"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            type=Path,
+            help="Feed files, optionally gzip-compressed"
+        )
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            default=None,
+            help="Feed format (default: guessed from the file extension)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50_000,
+            help="Number of items merged per transaction"
+        )
+
+    def handle(self, *args, **options):
+        self.technology_ids: Dict[str, int] = {}
+        started = time.perf_counter()
+        totals = {"read": 0, "skipped": 0, "created": 0}
+        dates = set()
+
+        for path in options["paths"]:
+            if not path.exists():
+                raise CommandError(f"{path} does not exist")
+            feed_format = options["format"] or guess_format(path)
+            batch: Dict[tuple, Dict[str, Any]] = {}
+            for item in read_feed(path, feed_format):
+                totals["read"] += 1
+                try:
+                    key, url, technologies = self.clean_item(item)
+                except (ValidationError, KeyError, TypeError, ValueError):
+                    totals["skipped"] += 1
+                    continue
+                if key in batch:
+                    batch[key]["technologies"].update(technologies)
+                else:
+                    batch[key] = {"url": url, "technologies": technologies}
+                dates.add(key[0])
+                if len(batch) >= options["batch_size"]:
+                    totals["created"] += self.merge_batch(batch)
+                    batch = {}
+            if batch:
+                totals["created"] += self.merge_batch(batch)
+        if dates:
+            rebuild_sketches(min(dates), max(dates))
+        bump_data_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {totals['read']} items, created {totals['created']} jobs, "
+            f"skipped {totals['skipped']} invalid items "
+            f"in {elapsed:.1f}s ({totals['read'] / elapsed:.0f} items/s)"
+        ))
+
+    @staticmethod
+    def clean_item(item: Dict[str, Any]) -> tuple[tuple, str, set[str]]:
+        """
+        :return: The item's natural key, URL and technologies
+        :raise ValidationError: If a value doesn't fit its column
+        """
+        if not isinstance(item, dict):
+            raise ValidationError("Not an object")
+        field = Job._meta.get_field
+        technologies = item.get("technologies") or []
+        if not isinstance(technologies, list):
+            raise ValidationError("technologies should be a list")
+        name = Technology._meta.get_field("name")
+        return (
+            (
+                clean_value(field("date"), item["date_posted"]),
+                clean_value(field("title"), item["title"]),
+                clean_value(field("company"), item["company"]),
+                clean_value(field("english"), item["english"]),
+                clean_value(field("experience"), item["experience"]),
+            ),
+            clean_value(field("url"), item["url"]),
+            {clean_value(name, tech) for tech in technologies},
+        )
+
+    def resolve_technologies(self, names: set[str]) -> None:
+        missing = names - self.technology_ids.keys()
+        if not missing:
+            return
+        Technology.objects.bulk_create(
+            [Technology(name=name) for name in missing],
+            ignore_conflicts=True
+        )
+        self.technology_ids.update(
+            Technology.objects.filter(name__in=missing).values_list(
+                "name", "id"
+            )
+        )
+
+    def merge_batch(self, batch: Dict[tuple, Dict[str, Any]]) -> int:
+        self.resolve_technologies(
+            set().union(*(value["technologies"] for value in batch.values()))
+        )
+        job_table = Job._meta.db_table
+        through_table = Job.technologies.through._meta.db_table
+        key_match = " AND ".join(
+            f"j.{column} = s.{column}" for column in NATURAL_KEY
+        )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE import_job_stage ("
+                "n integer PRIMARY KEY, date date, title varchar(255), "
+                "company varchar(255), url varchar(200), "
+                "english varchar(255), experience integer, "
+                "technology_mask bigint"
+                ") ON COMMIT DROP"
+            )
+            cursor.execute(
+                "CREATE TEMP TABLE import_link_stage ("
+                "n integer, technology_id bigint"
+                ") ON COMMIT DROP"
+            )
+            copy_rows("import_job_stage", STAGE_COLUMNS, (
+                (n, date, title, company, value["url"], english, experience,
+                 technology_mask(value["technologies"]))
+                for n, ((date, title, company, english, experience), value)
+                in enumerate(batch.items())
+            ))
+            copy_rows("import_link_stage", ["n", "technology_id"], (
+                (n, self.technology_ids[tech])
+                for n, value in enumerate(batch.values())
+                for tech in value["technologies"]
+            ))
+            cursor.execute("ANALYZE import_job_stage")
+            cursor.execute(
+                f"INSERT INTO {job_table} "
+                f"(date, title, company, url, english, experience, "
+                f"technology_mask) "
+                f"SELECT s.date, s.title, s.company, s.url, s.english, "
+                f"s.experience, s.technology_mask FROM import_job_stage s "
+                f"WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {job_table} j WHERE {key_match})"
+            )
+            created = cursor.rowcount
+            # Jobs that already existed may have gained technologies
+            cursor.execute(
+                f"UPDATE {job_table} j "
+                f"SET technology_mask = j.technology_mask | s.technology_mask "
+                f"FROM import_job_stage s WHERE {key_match} "
+                f"AND j.technology_mask | s.technology_mask "
+                f"<> j.technology_mask"
+            )
+            cursor.execute(
+                f"INSERT INTO {through_table} (job_id, technology_id) "
+                f"SELECT j.id, l.technology_id FROM import_link_stage l "
+                f"JOIN import_job_stage s ON s.n = l.n "
+                f"JOIN {job_table} j ON {key_match} "
+                f"ON CONFLICT DO NOTHING"
+            )
+        return created
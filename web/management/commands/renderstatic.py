@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from web.prerender import render_static_dashboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the unfiltered dashboard pages and chart JSON to static "
+        "files served by the web server"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            default=settings.STATIC_DASHBOARD_DIR,
+            help="Directory served by the web server, emptied of old files"
+        )
+        parser.add_argument(
+            "--min-vacancies",
+            nargs="+",
+            type=int,
+            default=settings.STATIC_DASHBOARD_MIN_VACANCIES,
+            help="min_vacancies values to render a page for"
+        )
+
+    def handle(self, *args, **options):
+        written = render_static_dashboard(
+            Path(options["directory"]), options["min_vacancies"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {len(written)} files to {options['directory']}"
+        ))
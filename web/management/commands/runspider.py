@@ -3,6 +3,8 @@ from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 
 from scraper.spiders.djinni import DjinniSpider
+from web.crawls import single_flight_crawl
+from web.snapshot import write_snapshot
 
 
 class Command(BaseCommand):
@@ -17,7 +19,28 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        technologies = options["technologies"]
-        process = CrawlerProcess(get_project_settings())
-        process.crawl(DjinniSpider, technologies=technologies)
-        process.start()
+        with single_flight_crawl(options["technologies"]) as crawl:
+            for technology, run in crawl.merged.items():
+                if run is None:
+                    self.stdout.write(f"{technology} is already being crawled")
+                else:
+                    self.stdout.write(
+                        f"{technology} is already being crawled by run "
+                        f"{run.pk} since {run.started_at:%Y-%m-%d %H:%M:%S}"
+                    )
+            if not crawl.technologies:
+                return
+            process = CrawlerProcess(get_project_settings())
+            crawler = process.create_crawler(DjinniSpider)
+            process.crawl(crawler, technologies=crawl.technologies)
+            process.start()
+            crawl.stats = crawler.stats.get_stats()
+        # Stamped with the data version the crawl left, bumping it again
+        # would make the snapshot stale right away
+        written = write_snapshot()
+        self.stdout.write(
+            f"Crawled {', '.join(crawl.technologies)} in run {crawl.run.pk}: "
+            f"{crawl.stats.get('item_scraped_count', 0)} items, "
+            f"{crawl.stats.get('jobs_created', 0)} new jobs"
+        )
+        self.stdout.write(f"Wrote a snapshot of {written} jobs")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from web.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write the columnar job snapshot used by the dashboard"
+
+    def handle(self, *args, **options):
+        written = write_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote a snapshot of {written} jobs")
+        )
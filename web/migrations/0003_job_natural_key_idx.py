@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0002_job_experience"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["date", "company", "title"], name="job_natural_key_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:50
+
+from django.db import migrations, models
+
+import config
+
+
+def fill_technology_masks(apps, schema_editor):
+    Job = apps.get_model("web", "Job")
+    Technology = apps.get_model("web", "Technology")
+    bits = ", ".join(
+        ["(%s, %s)"] * len(config.allowed_technologies_python)
+    )
+    params = [
+        value
+        for bit, name in enumerate(config.allowed_technologies_python)
+        for value in (name, bit)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Job._meta.db_table} AS j
+            SET technology_mask = m.mask
+            FROM (
+                SELECT jt.job_id, bit_or(1::bigint << b.bit) AS mask
+                FROM {Job.technologies.through._meta.db_table} AS jt
+                JOIN {Technology._meta.db_table} AS t ON t.id = jt.technology_id
+                JOIN (VALUES {bits}) AS b(name, bit) ON b.name = t.name
+                GROUP BY jt.job_id
+            ) AS m
+            WHERE m.job_id = j.id
+            """,
+            params,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0003_job_natural_key_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="technology_mask",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_technology_masks, migrations.RunPython.noop),
+    ]
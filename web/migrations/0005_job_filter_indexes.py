@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0004_job_technology_mask"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["experience", "date"], name="job_experience_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["english", "date"], name="job_english_date_idx"),
+        ),
+    ]
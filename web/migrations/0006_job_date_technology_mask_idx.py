@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0005_job_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["date", "technology_mask"], name="job_date_technology_mask_idx"
+            ),
+        ),
+    ]
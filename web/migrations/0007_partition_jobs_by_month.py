@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:06
+
+from datetime import date
+
+from django.db import migrations, models
+
+# Months created ahead, later ones are added by `manage.py compactjobs`
+MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    months = month.year * 12 + month.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_jobs(apps, schema_editor):
+    Job = apps.get_model("web", "Job")
+    table = Job._meta.db_table
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} RENAME TO {quote(table + '_old')}"
+        )
+        cursor.execute(
+            f"""
+            CREATE TABLE {quote(table)} (
+                LIKE {quote(table + '_old')} INCLUDING DEFAULTS INCLUDING IDENTITY,
+                PRIMARY KEY (id, date)
+            ) PARTITION BY RANGE (date)
+            """
+        )
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', date)::date "
+            f"FROM {quote(table + '_old')}"
+        )
+        this_month = date.today().replace(day=1)
+        months = {month for month, in cursor.fetchall()} | {
+            add_months(this_month, offset) for offset in range(MONTHS_AHEAD + 1)
+        }
+        for month in sorted(months):
+            cursor.execute(
+                f"CREATE TABLE {quote(f'{table}_p{month:%Y_%m}')} "
+                f"PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+        cursor.execute(
+            f"CREATE TABLE {quote(table + '_default')} "
+            f"PARTITION OF {quote(table)} DEFAULT"
+        )
+        cursor.execute(
+            f"INSERT INTO {quote(table)} SELECT * FROM {quote(table + '_old')}"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"COALESCE(max(id), 0) + 1, false) FROM {quote(table + '_old')}",
+            [table],
+        )
+        cursor.execute(f"DROP TABLE {quote(table + '_old')}")
+    # Indexes on the parent are created on every partition, present or future
+    for index in Job._meta.indexes:
+        schema_editor.add_index(Job, index)
+
+
+def unpartition_jobs(apps, schema_editor):
+    Job = apps.get_model("web", "Job")
+    table = Job._meta.db_table
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} RENAME TO {quote(table + '_old')}"
+        )
+        cursor.execute(
+            f"""
+            CREATE TABLE {quote(table)} (
+                LIKE {quote(table + '_old')} INCLUDING DEFAULTS INCLUDING IDENTITY,
+                PRIMARY KEY (id)
+            )
+            """
+        )
+        cursor.execute(
+            f"INSERT INTO {quote(table)} SELECT * FROM {quote(table + '_old')}"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"COALESCE(max(id), 0) + 1, false) FROM {quote(table + '_old')}",
+            [table],
+        )
+        # Drops the partitions along
+        cursor.execute(f"DROP TABLE {quote(table + '_old')}")
+    for index in Job._meta.indexes:
+        schema_editor.add_index(Job, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0006_job_date_technology_mask_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="technologies",
+            field=models.ManyToManyField(
+                db_constraint=False, related_name="jobs", to="web.technology"
+            ),
+        ),
+        migrations.RunPython(partition_jobs, unpartition_jobs),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0007_partition_jobs_by_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobMonthRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("english", models.CharField(max_length=255)),
+                ("experience", models.IntegerField()),
+                ("technology_mask", models.BigIntegerField()),
+                ("jobs", models.IntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="jobmonthrollup",
+            constraint=models.UniqueConstraint(
+                fields=("date", "experience", "english", "technology_mask"),
+                name="job_month_rollup_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('simple', coalesce({row}company, '')), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION web_job_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER web_job_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, company ON web_job
+    FOR EACH ROW EXECUTE FUNCTION web_job_search_vector();
+
+UPDATE web_job SET search_vector = {SEARCH_VECTOR.format(row="")};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER web_job_search_vector_update ON web_job;
+DROP FUNCTION web_job_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0008_jobmonthrollup"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="job_search_vector_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="job_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["company"],
+                name="job_company_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:21
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0010_job_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobDaySketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("experience_level", models.CharField(max_length=16)),
+                ("jobs", models.IntegerField(default=0)),
+                (
+                    "technology_counts",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), default=list, size=None
+                    ),
+                ),
+                ("companies_hll", models.BinaryField(default=bytes)),
+                ("company_counts", models.BinaryField(default=bytes)),
+                ("top_companies", models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="jobdaysketch",
+            constraint=models.UniqueConstraint(
+                fields=("date", "experience_level"), name="job_day_sketch_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0012_crawlrun"),
+    ]
+
+    operations = [
+        # The table is the through table Django created, whose foreign keys
+        # were both dropped by 0007
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="JobTechnology",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "job",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="web.job",
+                            ),
+                        ),
+                        (
+                            "technology",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="web.technology",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "web_job_technologies",
+                        "unique_together": {("job", "technology")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="job",
+                    name="technologies",
+                    field=models.ManyToManyField(
+                        related_name="jobs",
+                        through="web.JobTechnology",
+                        to="web.technology",
+                    ),
+                ),
+            ],
+        ),
+        # Only the job can't be referenced, restore the technology's key
+        migrations.AlterField(
+            model_name="jobtechnology",
+            name="technology",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="web.technology"
+            ),
+        ),
+    ]
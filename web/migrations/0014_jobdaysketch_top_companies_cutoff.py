@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+# web.sketches.TOP_COMPANIES when this migration was written
+TOP_COMPANIES = 50
+
+
+def fill_cutoffs(apps, schema_editor):
+    # Companies only ever left a day's top at its minimum, which never
+    # decreases: the least kept company bounds any company left out
+    JobDaySketch = apps.get_model("web", "JobDaySketch")
+    rows = []
+    for row in JobDaySketch.objects.only("top_companies").iterator():
+        if len(row.top_companies) >= TOP_COMPANIES:
+            row.top_companies_cutoff = min(row.top_companies.values())
+            rows.append(row)
+    JobDaySketch.objects.bulk_update(rows, ["top_companies_cutoff"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("web", "0013_jobtechnology"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobdaysketch",
+            name="top_companies_cutoff",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_cutoffs, migrations.RunPython.noop),
+    ]
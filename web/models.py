@@ -1,4 +1,11 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 
 class Job(models.Model):
@@ -8,8 +15,167 @@ class Job(models.Model):
     url = models.URLField()
     english = models.CharField(max_length=255)
     experience = models.IntegerField()
-    technologies = models.ManyToManyField('Technology', related_name='jobs')
+    technologies = models.ManyToManyField(
+        'Technology', related_name='jobs', through='JobTechnology'
+    )
+    # Bit i is set when the job mentions the i-th allowed technology,
+    # see web.bitmask
+    technology_mask = models.BigIntegerField(default=0)
+    # Weighted title and company words, kept up to date by a database
+    # trigger (see migration 0009), so bulk COPYs are covered too
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["date", "company", "title"],
+                name="job_natural_key_idx"
+            ),
+            # Dashboard filters narrow by level/English, then by date range
+            models.Index(
+                fields=["experience", "date"],
+                name="job_experience_date_idx"
+            ),
+            models.Index(
+                fields=["english", "date"],
+                name="job_english_date_idx"
+            ),
+            # Lets trend buckets be computed with an index-only scan
+            models.Index(
+                fields=["date", "technology_mask"],
+                name="job_date_technology_mask_idx"
+            ),
+            # Keyset pages of the jobs API, newest first
+            models.Index(fields=["date", "id"], name="job_date_id_idx"),
+            # Full-text search, plus trigram matching for partial words
+            GinIndex(fields=["search_vector"], name="job_search_vector_idx"),
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="job_title_trgm_idx"
+            ),
+            GinIndex(
+                fields=["company"],
+                opclasses=["gin_trgm_ops"],
+                name="job_company_trgm_idx"
+            ),
+        ]
 
 
 class Technology(models.Model):
     name = models.CharField(max_length=100, unique=True)
+
+
+class JobTechnology(models.Model):
+    # Jobs are partitioned by month, so their primary key is (id, date)
+    # and this table can't hold a foreign key to them
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, db_constraint=False)
+    technology = models.ForeignKey(Technology, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'web_job_technologies'
+        unique_together = [('job', 'technology')]
+
+
+class JobMonthRollup(models.Model):
+    """
+    Job counts of an archived month, kept once its partition is dropped.
+    Field names follow Job, so JobFilters apply to rollups as well.
+    Only the monthly technology trends read them.
+    """
+
+    # First day of the month
+    date = models.DateField()
+    english = models.CharField(max_length=255)
+    experience = models.IntegerField()
+    technology_mask = models.BigIntegerField()
+    jobs = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "experience", "english", "technology_mask"],
+                name="job_month_rollup_unique"
+            ),
+        ]
+
+
+class JobDaySketch(models.Model):
+    """
+    Mergeable summary of the jobs of one day and experience level, kept
+    up to date at ingest for the approximate dashboard, see web.sketches.
+    Unlike the jobs, sketches are kept when their month is compacted.
+    """
+
+    date = models.DateField()
+    experience_level = models.CharField(max_length=16)
+    jobs = models.IntegerField(default=0)
+    # Jobs mentioning each technology, in web.bitmask.TECHNOLOGIES order
+    technology_counts = ArrayField(models.IntegerField(), default=list)
+    # zlib-compressed HyperLogLog registers and Count-Min counters
+    companies_hll = models.BinaryField(default=bytes)
+    company_counts = models.BinaryField(default=bytes)
+    # Heaviest companies of the day, with their estimated number of jobs,
+    # and the most jobs any company left out of them can have that day
+    top_companies = models.JSONField(default=dict)
+    top_companies_cutoff = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "experience_level"],
+                name="job_day_sketch_unique"
+            ),
+        ]
+
+
+class CrawlRun(models.Model):
+    """One crawl of a set of technologies, see web.crawls."""
+
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    technologies = ArrayField(models.CharField(max_length=100), default=list)
+    status = models.CharField(max_length=16, choices=STATUSES, default=RUNNING)
+    started_at = models.DateTimeField(default=timezone.now)
+    # Renewed with the leases, a running crawl that stopped renewing died
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    items_scraped = models.IntegerField(default=0)
+    jobs_created = models.IntegerField(default=0)
+    # Crawl requests for the same technologies merged into this one
+    merged_requests = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    @property
+    def duration(self) -> Optional[timedelta]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class CrawlLease(models.Model):
+    """
+    Crawl leases, also taken in Redis when it is reachable. Recorded
+    here either way, so every process sees them, see web.crawls.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    token = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+
+
+class DataVersion(models.Model):
+    """
+    The data version of web.versioning, one row. Kept here as well as in
+    the cache, so a flushed cache doesn't start a new version, which
+    would make the snapshot look stale.
+    """
+
+    version = models.BigIntegerField()
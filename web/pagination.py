@@ -0,0 +1,191 @@
+import base64
+import bisect
+import json
+from datetime import date
+from functools import cmp_to_key
+from typing import Any, List, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Q, QuerySet
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [
+        {"date": value.isoformat()} if isinstance(value, date) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [
+            date.fromisoformat(value["date"])
+            if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError) as error:
+        raise InvalidCursor("Invalid cursor") from error
+
+
+def parse_limit(value: Optional[str]) -> int:
+    try:
+        limit = int(value) if value else DEFAULT_LIMIT
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def seek_q(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Selects the rows after ``values`` in ``ordering``, e.g. for
+    ("-date", "-id"): date < d OR (date = d AND id < i). The first
+    column also gets a plain bound, so its index can narrow the scan.
+    """
+    q = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        q |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    first = ordering[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & q
+
+
+def keyset_page(
+        queryset: QuerySet,
+        ordering: Sequence[str],
+        cursor: Optional[str],
+        limit: int,
+) -> tuple[list, Optional[str]]:
+    """
+    Returns one page of ``queryset`` and the cursor of the next one.
+    Instead of an OFFSET, the cursor holds the ordering values of the
+    last row, so every page costs the same as the first.
+
+    ``ordering`` must end with a unique field, and every ordering field
+    must be available on the rows (model instances or dicts).
+    """
+    if cursor:
+        values = cursor_values(cursor, ordering)
+        fields = ordering_fields(queryset, ordering)
+        queryset = queryset.filter(
+            seek_q(ordering, to_field_values(values, fields))
+        )
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+    return page_and_cursor(rows, ordering, limit)
+
+
+def keyset_page_in_memory(
+        rows: Sequence[Any],
+        ordering: Sequence[str],
+        cursor: Optional[str],
+        limit: int,
+) -> tuple[list, Optional[str]]:
+    """
+    Same as ``keyset_page``, cursors included, for ``rows`` sorted by
+    ``sort_rows``: the cursor is found by binary search.
+    """
+    start = 0
+    if cursor:
+        key = ordering_key(ordering)
+        names = [field.lstrip("-") for field in ordering]
+        start = bisect.bisect_right(
+            rows, key(cursor_values(cursor, ordering)),
+            key=lambda row: key(row_values(row, names)),
+        )
+    return page_and_cursor(list(rows[start:start + limit + 1]), ordering, limit)
+
+
+def ordering_key(ordering: Sequence[str]):
+    return cmp_to_key(lambda a, b: compare_values(ordering, a, b))
+
+
+def sort_rows(rows: Sequence[Any], ordering: Sequence[str]) -> list:
+    """
+    Sorts rows for ``keyset_page_in_memory``. Sorted here, not by the
+    database, whose collation may order strings differently.
+    """
+    key = ordering_key(ordering)
+    names = [field.lstrip("-") for field in ordering]
+    return sorted(rows, key=lambda row: key(row_values(row, names)))
+
+
+def cursor_values(cursor: str, ordering: Sequence[str]) -> List[Any]:
+    values = decode_cursor(cursor)
+    if len(values) != len(ordering):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def ordering_fields(
+        queryset: QuerySet, ordering: Sequence[str]
+) -> List[Field]:
+    fields = []
+    for name in (field.lstrip("-") for field in ordering):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            fields.append(annotation.output_field)
+        else:
+            fields.append(queryset.model._meta.get_field(name))
+    return fields
+
+
+def to_field_values(values: Sequence[Any], fields: Sequence[Field]) -> list:
+    """
+    Converts cursor values to their fields' types, a value the column
+    can't hold (of another type, out of range or null) is an invalid
+    cursor rather than a database error.
+    """
+    converted = []
+    try:
+        for value, field in zip(values, fields):
+            value = field.to_python(value)
+            if value is None:
+                raise ValidationError("Null cursor value")
+            field.run_validators(value)
+            converted.append(value)
+    except (ValidationError, TypeError, ValueError) as error:
+        raise InvalidCursor("Invalid cursor") from error
+    return converted
+
+
+def compare_values(
+        ordering: Sequence[str], first: Sequence[Any], second: Sequence[Any]
+) -> int:
+    try:
+        for field, a, b in zip(ordering, first, second):
+            if a != b:
+                result = -1 if a < b else 1
+                return -result if field.startswith("-") else result
+    except TypeError as error:
+        # A cursor value of another type than the column's
+        raise InvalidCursor("Invalid cursor") from error
+    return 0
+
+
+def row_values(row: Any, names: Sequence[str]) -> List[Any]:
+    if isinstance(row, dict):
+        return [row[name] for name in names]
+    return [getattr(row, name) for name in names]
+
+
+def page_and_cursor(
+        rows: list, ordering: Sequence[str], limit: int
+) -> tuple[list, Optional[str]]:
+    """Trims the ``limit + 1`` rows fetched to a page and its cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    names = [field.lstrip("-") for field in ordering]
+    return rows, encode_cursor(row_values(rows[-1], names))
@@ -0,0 +1,199 @@
+import os
+import re
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+from django.db import connection
+from django.db.models import Count
+
+from .exports import CHUNK_SIZE, chunked, job_rows
+from .filters import JobFilters
+from .models import Job, JobMonthRollup
+from .snapshot import SNAPSHOT_FIELDS, snapshot_schema
+
+JOB_TABLE = Job._meta.db_table
+DEFAULT_PARTITION = f"{JOB_TABLE}_default"
+PARTITION_NAME = re.compile(rf"^{JOB_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def add_months(month: date, count: int) -> date:
+    months = month.year * 12 + month.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{JOB_TABLE}_p{month:%Y_%m}"
+
+
+def job_partitions() -> Dict[date, str]:
+    """Maps the first day of each partitioned month to its table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [JOB_TABLE],
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month: date) -> None:
+    """
+    Adds the partition of ``month``, moving its rows out of the default
+    partition first, as Postgres refuses to attach it otherwise.
+    """
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} (LIKE {quote(JOB_TABLE)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {quote(DEFAULT_PARTITION)}
+                WHERE date >= %s AND date < %s
+                RETURNING *
+            )
+            INSERT INTO {quote(name)} SELECT * FROM moved
+            """,
+            bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(JOB_TABLE)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+
+
+def ensure_partitions(months_ahead: int) -> list[date]:
+    """
+    Creates the partitions of the coming months and of every month that
+    ended up in the default partition.
+
+    :return: The months whose partition was created
+    """
+    quote = connection.ops.quote_name
+    this_month = date.today().replace(day=1)
+    months = {
+        add_months(this_month, offset) for offset in range(months_ahead + 1)
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', date)::date "
+            f"FROM {quote(DEFAULT_PARTITION)}"
+        )
+        months |= {month for month, in cursor.fetchall()}
+    created = sorted(months - job_partitions().keys())
+    for month in created:
+        create_partition(month)
+    return created
+
+
+def lock_partition(month: date) -> None:
+    """Blocks writes to the month until the transaction ends."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {connection.ops.quote_name(partition_name(month))} "
+            f"IN SHARE MODE"
+        )
+
+
+def archive_month(month: date, directory: Path) -> tuple[Path, int]:
+    """
+    Writes the jobs of ``month`` with their technologies to a Parquet
+    file, replaced atomically so a failed run never leaves half a file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"jobs-{month:%Y-%m}.parquet"
+    # Late rows can bring an archived month back, keep both files
+    copy = 1
+    while path.exists():
+        copy += 1
+        path = directory / f"jobs-{month:%Y-%m}.{copy}.parquet"
+    temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+    schema = snapshot_schema()
+    filters = JobFilters(
+        date_from=month, date_to=add_months(month, 1) - timedelta(days=1)
+    )
+    written = 0
+    try:
+        with pq.ParquetWriter(str(temporary_path), schema) as writer:
+            rows = job_rows(filters, SNAPSHOT_FIELDS)
+            for chunk in chunked(rows, CHUNK_SIZE):
+                columns = list(zip(*chunk))
+                writer.write_table(pa.table(
+                    [pa.array(column, type=field.type)
+                     for column, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                written += len(chunk)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    os.replace(temporary_path, path)
+    return path, written
+
+
+def compact_month(month: date) -> int:
+    """
+    Replaces the jobs of ``month`` by their rollup: counts are kept per
+    experience, English level and technology mask, then the partition
+    and its technology links are dropped. Runs in the caller's
+    transaction, so a failure leaves the month untouched.
+
+    :return: Number of jobs removed
+    """
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    jobs = Job.objects.filter(
+        date__gte=month, date__lt=add_months(month, 1)
+    )
+    key_fields = ["experience", "english", "technology_mask"]
+    # Rows that reached the default partition late may bring a month back
+    counts = {
+        tuple(getattr(rollup, field) for field in key_fields): rollup.jobs
+        for rollup in JobMonthRollup.objects.filter(date=month)
+    }
+    for *key, count in jobs.values_list(*key_fields).annotate(
+            count=Count("id")).order_by():
+        counts[tuple(key)] = counts.get(tuple(key), 0) + count
+    JobMonthRollup.objects.bulk_create(
+        [
+            JobMonthRollup(
+                date=month, jobs=count, **dict(zip(key_fields, key))
+            )
+            for key, count in counts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["date", *key_fields],
+        update_fields=["jobs"],
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(Job.technologies.through._meta.db_table)} "
+            f"WHERE job_id IN (SELECT id FROM {quote(name)})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(JOB_TABLE)} DETACH PARTITION {quote(name)}"
+        )
+        cursor.execute(f"SELECT count(*) FROM {quote(name)}")
+        removed = cursor.fetchone()[0]
+        cursor.execute(f"DROP TABLE {quote(name)}")
+    return removed
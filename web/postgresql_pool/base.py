@@ -0,0 +1,147 @@
+"""
+PostgreSQL backend whose connections come from a psycopg_pool
+ConnectionPool, one per database alias and process, configured by
+``OPTIONS["pool"]``. A pool is replaced when the connection settings of
+its alias change, e.g. when tests switch to the test database. Closing a
+connection (at the end of a request, a task or a pipeline item) returns
+it to the pool instead.
+"""
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+# Alias -> (connection settings, pool)
+_pools: Dict[str, Tuple[tuple, ConnectionPool]] = {}
+_pools_lock = threading.Lock()
+# Pools inherited by a forked child must not be used nor closed (that
+# would end the parent's sessions), only forgotten
+_inherited_pools: list = []
+
+
+def _forget_pools() -> None:
+    _inherited_pools.extend(pool for _, pool in _pools.values())
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+def close_pool(alias: str) -> None:
+    with _pools_lock:
+        cached = _pools.pop(alias, None)
+    if cached is not None:
+        cached[1].close()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Counters of this process's pools, plus the mean wait for a
+    connection and the share of the maximum size in use (saturation).
+    """
+    stats = {}
+    for alias, (_, pool) in _pools.items():
+        pool_stats = pool.get_stats()
+        requests = pool_stats.get("requests_num", 0)
+        in_use = pool_stats["pool_size"] - pool_stats["pool_available"]
+        stats[alias] = {
+            **pool_stats,
+            "mean_wait_ms": (
+                pool_stats.get("requests_wait_ms", 0) / requests
+                if requests else 0
+            ),
+            "saturation": in_use / pool_stats["pool_max"],
+        }
+    return stats
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled sessions would keep the test database in use
+        close_pool(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self) -> ConnectionPool:
+        params = self.get_connection_params()
+        # The adapters context is a new object every time, the rest
+        # identifies the database and the session
+        key = tuple(sorted(
+            (name, value) for name, value in params.items()
+            if isinstance(value, (str, int, float, bool, type(None)))
+        ))
+        cached = _pools.get(self.alias)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if self.settings_dict["CONN_MAX_AGE"]:
+            raise ImproperlyConfigured(
+                "Pooled connections are closed after each request, "
+                "CONN_MAX_AGE must be 0"
+            )
+        with _pools_lock:
+            cached = _pools.get(self.alias)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            if cached is not None:
+                # Connections still out are closed when handed back
+                cached[1].close(timeout=0)
+            options = self.settings_dict["OPTIONS"].get("pool", {})
+            check = options.get("check", True)
+            pool = ConnectionPool(
+                kwargs=params,
+                min_size=options.get("min_size", 1),
+                max_size=options.get("max_size", 10),
+                timeout=options.get("timeout", 30),
+                max_idle=options.get("max_idle", 600),
+                max_lifetime=options.get("max_lifetime", 3600),
+                # Runs an empty query when a connection is handed out,
+                # so a dropped one is replaced rather than failing
+                check=ConnectionPool.check_connection if check else None,
+                name=f"django-{self.alias}",
+                open=False,
+            )
+            _pools[self.alias] = (key, pool)
+            return pool
+
+    def get_connection_params(self) -> Dict[str, Any]:
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        # Opened on first use, so forked workers never share a pool
+        pool.open()
+        connection = pool.getconn()
+        # Same isolation level handling as the parent, every connection of
+        # the pool shares the options
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = IsolationLevel.READ_COMMITTED
+        if isolation_level is not None:
+            try:
+                self.isolation_level = IsolationLevel(isolation_level)
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level {isolation_level} "
+                    f"specified. Use one of the psycopg.IsolationLevel values."
+                )
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # Rolled back by the pool if a transaction is still open
+            self.connection._pool.putconn(self.connection)
+        # Closing inside an atomic block keeps the attribute otherwise,
+        # the connection belongs to the pool now
+        self.connection = None
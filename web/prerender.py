@@ -0,0 +1,123 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+from django.test import RequestFactory
+
+from .filters import JobFilters
+from .rendering import chart_json
+from .versioning import compress
+from .views import (
+    cached_aggregate, chart_specs, collect_aggregates, dashboard_aggregates,
+    prepare_response
+)
+
+DEFAULT_MIN_VACANCIES = 3
+DEFAULT_PERIOD = "month"
+
+# Names of the files written by render_static_dashboard, gzipped or not,
+# relative to its directory. Nothing else there is ever deleted
+RENDERED_FILE = re.compile(
+    r"(index\.html|min_vacancies-\d+\.html|charts/[\w-]+\.json)(\.gz)?"
+)
+
+
+def page_name(min_vacancies: int) -> str:
+    # Matched against the query string by the web server, see deploy/nginx.conf
+    return f"min_vacancies-{min_vacancies}.html"
+
+
+def write_file(path: Path, content: bytes) -> list[Path]:
+    """
+    Writes ``content`` and its gzipped copy, each replaced atomically so
+    the web server never serves half a file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = []
+    for file_path, data in (
+            (path, content),
+            (path.with_name(path.name + ".gz"), compress(content, "gzip")),
+    ):
+        temporary_path = file_path.with_name(
+            f".{file_path.name}.{os.getpid()}.tmp"
+        )
+        temporary_path.write_bytes(data)
+        os.replace(temporary_path, file_path)
+        written.append(file_path)
+    return written
+
+
+def render_page(params: Dict[str, int]) -> bytes:
+    request = RequestFactory().get("/", params)
+    return prepare_response(request).content
+
+
+def render_chart_items(min_vacancies: int) -> Dict[str, dict]:
+    aggregates = collect_aggregates(
+        dashboard_aggregates(JobFilters(), min_vacancies, DEFAULT_PERIOD)
+    )
+    items = {}
+    for name, (builder, args) in chart_specs(aggregates).items():
+        item = chart_json(builder, args)
+        if item is not None:
+            items[name.lower()] = item
+    return items
+
+
+def remove_stale_files(directory: Path, written: Set[Path]) -> int:
+    removed = 0
+    for path in [*directory.glob("*"), *directory.glob("charts/*")]:
+        name = path.relative_to(directory).as_posix()
+        if (
+                path.is_file() and path not in written
+                and RENDERED_FILE.fullmatch(name)
+        ):
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def render_static_dashboard(
+        directory: Path, min_vacancies_values: Iterable[int]
+) -> list[Path]:
+    """
+    Renders the unfiltered dashboard into ``directory``: ``index.html``,
+    one page per ``min_vacancies`` value, and the Bokeh ``json_item`` of
+    every chart under ``charts/``. The company chart, the only one that
+    depends on ``min_vacancies``, gets one file per value.
+
+    Pages and charts left from an earlier run are removed, so a value
+    dropped from the settings goes back to Django. Other files in the
+    directory are left alone.
+
+    :return: The pages and charts written, without their gzipped copies
+    """
+    written: Set[Path] = set()
+    pages = [directory / "index.html"]
+    written.update(write_file(pages[0], render_page({})))
+    for min_vacancies in min_vacancies_values:
+        path = directory / page_name(min_vacancies)
+        written.update(write_file(path, render_page(
+            {"min_vacancies": min_vacancies}
+        )))
+        pages.append(path)
+
+    charts = []
+    items = render_chart_items(DEFAULT_MIN_VACANCIES)
+    for min_vacancies in min_vacancies_values:
+        # Aggregated once already, for the page
+        companies = cached_aggregate("companies", *dashboard_aggregates(
+            JobFilters(), min_vacancies, DEFAULT_PERIOD
+        )["companies"])
+        item = chart_json("create_company_plot", (companies,))
+        if item is not None:
+            items[f"companies-{min_vacancies}"] = item
+    for name, item in items.items():
+        path = directory / "charts" / f"{name}.json"
+        written.update(write_file(path, json.dumps(item).encode()))
+        charts.append(path)
+
+    remove_stale_files(directory, written)
+    return pages + charts
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+# Chart name -> (charts module function, arguments). Each chart is built
+# and serialized on its own, so they can be rendered in any process.
+ChartSpecs = Dict[str, Tuple[str, tuple]]
+
+_pool: Optional[Executor] = None
+
+
+def render_chart(builder: str, args: tuple) -> Optional[Tuple[str, str]]:
+    """Builds a chart and returns its ``components()``, or None without data."""
+    from bokeh.embed import components
+
+    from . import charts
+
+    plot = getattr(charts, builder)(*args)
+    if plot is None:
+        return None
+    return components(plot)
+
+
+def chart_json(builder: str, args: tuple) -> Optional[Dict[str, Any]]:
+    """Builds a chart and returns its ``json_item()``, or None without data."""
+    from bokeh.embed import json_item
+
+    from . import charts
+
+    plot = getattr(charts, builder)(*args)
+    if plot is None:
+        return None
+    return json_item(plot)
+
+
+def render_sequentially(specs: ChartSpecs) -> Dict[str, Any]:
+    return {
+        name: render_chart(builder, args)
+        for name, (builder, args) in specs.items()
+    }
+
+
+def warm_worker() -> None:
+    # Bokeh numbers models per process by default, charts rendered in
+    # different workers would get clashing ids on the same page
+    os.environ["BOKEH_SIMPLE_IDS"] = "no"
+    from . import charts  # noqa: F401 (pays for pandas and Bokeh imports)
+
+
+def get_render_pool() -> Optional[Executor]:
+    global _pool
+
+    processes = settings.DASHBOARD_RENDER_PROCESSES
+    if _pool is None and processes:
+        # Forking a threaded server is unsafe, forkserver children start
+        # from a clean process that already imported the chart modules
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload(["web.charts"])
+        _pool = ProcessPoolExecutor(
+            processes, mp_context=context, initializer=warm_worker
+        )
+    return _pool
+
+
+def warm_render_pool() -> None:
+    """
+    Starts every render process up front, called when a web worker
+    boots, so the first dashboard request doesn't pay for it.
+    """
+    pool = get_render_pool()
+    if pool is not None:
+        # Processes are started on demand, one per task waiting for one
+        for _ in range(settings.DASHBOARD_RENDER_PROCESSES):
+            pool.submit(os.getpid)
+
+
+def render_charts(specs: ChartSpecs) -> Dict[str, Any]:
+    """
+    Renders independent charts in the process pool when
+    ``DASHBOARD_RENDER_PROCESSES`` is set, one after another otherwise.
+    Maps each chart name to its (script, div), or None without data.
+    """
+    global _pool
+
+    pool = get_render_pool()
+    if pool is None:
+        return render_sequentially(specs)
+    try:
+        futures = {
+            name: pool.submit(render_chart, builder, args)
+            for name, (builder, args) in specs.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory), start a new pool later
+        _pool = None
+        return render_sequentially(specs)
@@ -0,0 +1,87 @@
+from typing import Any, Dict
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramWordSimilarity
+)
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast, Greatest
+from django.http import HttpRequest, JsonResponse
+
+from .bitmask import mask_technologies
+from .filters import JobFilters
+from .models import Job
+from .pagination import InvalidCursor, keyset_page, parse_limit
+
+# Titles mix English and Ukrainian, so words are indexed without stemming
+SEARCH_CONFIG = "simple"
+MIN_QUERY_LENGTH = 2
+
+SEARCH_ORDERING = ["-rank", "-id"]
+
+
+def search_jobs(text: str, filters: JobFilters) -> QuerySet:
+    """
+    Jobs whose title or company matches ``text``, as whole words
+    (full-text) or as part of a word (trigrams), annotated with a
+    ``rank`` that favors title matches.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        filters.apply(Job.objects.all())
+        .filter(
+            Q(search_vector=query)
+            | Q(title__trigram_word_similar=text)
+            | Q(company__trigram_word_similar=text)
+        )
+        # Double precision: a real rank wouldn't survive the cursor round
+        # trip exactly, and equal ranks would be skipped or repeated
+        .annotate(rank=Cast(
+            SearchRank(F("search_vector"), query)
+            + Greatest(
+                TrigramWordSimilarity(text, "title"),
+                TrigramWordSimilarity(text, "company"),
+            ),
+            FloatField(),
+        ))
+    )
+
+
+def search_result(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "date": job.date.isoformat(),
+        "title": job.title,
+        "company": job.company,
+        "url": job.url,
+        "english": job.english,
+        "experience": job.experience,
+        "technologies": mask_technologies(job.technology_mask),
+        "rank": job.rank,
+    }
+
+
+def search(request: HttpRequest) -> JsonResponse:
+    """
+    Ranked job search, narrowed by the dashboard filters, one keyset
+    page at a time: pass the returned ``next`` as ``cursor``.
+    """
+    text = request.GET.get("q", "").strip()
+    if len(text) < MIN_QUERY_LENGTH:
+        return JsonResponse({"results": [], "next": None})
+    jobs = search_jobs(text, JobFilters.from_request(request)).only(
+        "id", "date", "title", "company", "url", "english", "experience",
+        "technology_mask",
+    )
+    try:
+        page, cursor = keyset_page(
+            jobs,
+            SEARCH_ORDERING,
+            request.GET.get("cursor"),
+            parse_limit(request.GET.get("limit")),
+        )
+    except InvalidCursor as error:
+        return JsonResponse({"error": str(error)}, status=400)
+    return JsonResponse({
+        "results": [search_result(job) for job in page],
+        "next": cursor,
+    })
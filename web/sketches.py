@@ -0,0 +1,408 @@
+"""
+Mergeable summaries of the jobs of each day and experience level, for
+the approximate dashboard mode: a HyperLogLog of the companies (distinct
+count), a Count-Min sketch of their job counts, the heaviest companies
+of the day, and per-technology job counts. Merging the days of a date
+range costs the same however many jobs they hold.
+"""
+import hashlib
+import math
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, QuerySet
+
+from .bitmask import TECHNOLOGIES, unpack_masks
+from .filters import JobFilters, experience_level
+from .models import Job, JobDaySketch
+
+HLL_PRECISION = 12
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+# Heaviest companies kept per day and level, the candidates of a range
+TOP_COMPANIES = 50
+
+
+def company_hashes(company: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(company.encode(), digest_size=16).digest()
+    return (
+        int.from_bytes(digest[:8], "little"),
+        int.from_bytes(digest[8:], "little"),
+    )
+
+
+def pack(array: np.ndarray) -> bytes:
+    return zlib.compress(array.tobytes())
+
+
+def unpack(data: Optional[bytes], dtype, shape) -> np.ndarray:
+    if not data:
+        return np.zeros(shape, dtype=dtype)
+    return np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(shape)
+
+
+class HyperLogLog:
+    """Distinct count with a relative standard error of 1.04 / sqrt(m)."""
+
+    size = 1 << HLL_PRECISION
+    relative_error = 1.04 / math.sqrt(size)
+
+    def __init__(self, registers: Optional[np.ndarray] = None):
+        self.registers = (
+            np.zeros(self.size, dtype=np.uint8)
+            if registers is None else registers.copy()
+        )
+
+    def add(self, value_hash: int) -> None:
+        index = value_hash >> (64 - HLL_PRECISION)
+        rest = value_hash & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = 64 - HLL_PRECISION - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(
+            np.ldexp(1.0, -self.registers.astype(int))
+        )
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return float(raw)
+
+
+class CountMinSketch:
+    """
+    Counts that are never underestimated, and overestimated by at most
+    ``error(total)`` with probability ``confidence``.
+    """
+
+    shape = (CMS_DEPTH, CMS_WIDTH)
+    confidence = 1 - math.exp(-CMS_DEPTH)
+
+    def __init__(self, counters: Optional[np.ndarray] = None):
+        self.counters = (
+            np.zeros(self.shape, dtype=np.int64)
+            if counters is None else counters.astype(np.int64)
+        )
+
+    @staticmethod
+    def columns(hashes: tuple[int, int]) -> List[int]:
+        first, second = hashes
+        return [(first + row * second) % CMS_WIDTH for row in range(CMS_DEPTH)]
+
+    def add(self, hashes: tuple[int, int], count: int = 1) -> None:
+        self.counters[np.arange(CMS_DEPTH), self.columns(hashes)] += count
+
+    def estimate(self, hashes: tuple[int, int]) -> int:
+        return int(
+            self.counters[np.arange(CMS_DEPTH), self.columns(hashes)].min()
+        )
+
+    def merge(self, other: "CountMinSketch") -> None:
+        self.counters += other.counters
+
+    @staticmethod
+    def error(total: int) -> int:
+        return math.ceil(math.e / CMS_WIDTH * total)
+
+
+@dataclass
+class JobSketch:
+    """The summary of the jobs of one JobDaySketch row."""
+
+    jobs: int = 0
+    technology_counts: np.ndarray = field(
+        default_factory=lambda: np.zeros(len(TECHNOLOGIES), dtype=np.int64)
+    )
+    companies: HyperLogLog = field(default_factory=HyperLogLog)
+    company_counts: CountMinSketch = field(default_factory=CountMinSketch)
+    top_companies: Dict[str, int] = field(default_factory=dict)
+    # Upper bound of the jobs of any company not in top_companies
+    top_cutoff: int = 0
+
+    @classmethod
+    def from_model(cls, row: JobDaySketch) -> "JobSketch":
+        counts = np.zeros(len(TECHNOLOGIES), dtype=np.int64)
+        # Technologies are only ever appended, older rows may be shorter
+        counts[:len(row.technology_counts)] = row.technology_counts
+        return cls(
+            jobs=row.jobs,
+            technology_counts=counts,
+            companies=HyperLogLog(unpack(
+                row.companies_hll, np.uint8, HyperLogLog.size
+            )),
+            company_counts=CountMinSketch(unpack(
+                row.company_counts, np.uint32, CountMinSketch.shape
+            )),
+            top_companies=dict(row.top_companies),
+            top_cutoff=row.top_companies_cutoff,
+        )
+
+    def save_to(self, row: JobDaySketch) -> JobDaySketch:
+        row.jobs = self.jobs
+        row.technology_counts = self.technology_counts.tolist()
+        row.companies_hll = pack(self.companies.registers)
+        row.company_counts = pack(
+            self.company_counts.counters.astype(np.uint32)
+        )
+        row.top_companies = self.top_companies
+        row.top_companies_cutoff = self.top_cutoff
+        return row
+
+    def merge(self, other: "JobSketch") -> None:
+        self.jobs += other.jobs
+        self.technology_counts += other.technology_counts
+        self.companies.merge(other.companies)
+        self.company_counts.merge(other.company_counts)
+        # Re-estimated on the merged counts, the heaviest of both are kept
+        estimates = {
+            company: self.company_counts.estimate(company_hashes(company))
+            for company in {*self.top_companies, *other.top_companies}
+        }
+        top = sorted(estimates.items(), key=lambda item: -item[1])
+        self.top_companies = dict(top[:TOP_COMPANIES])
+        # A company missing now was left out of both sides, or dropped
+        # here with an estimate that never undercounts
+        self.top_cutoff = self.top_cutoff + other.top_cutoff
+        if len(top) > TOP_COMPANIES:
+            self.top_cutoff = max(self.top_cutoff, top[TOP_COMPANIES][1])
+
+    def add(self, company: str, mask: int, count: int = 1) -> None:
+        hashes = company_hashes(company)
+        self.jobs += count
+        self.add_technologies(mask, count)
+        self.companies.add(hashes[0])
+        self.company_counts.add(hashes, count)
+        self.top_companies[company] = self.company_counts.estimate(hashes)
+        if len(self.top_companies) > TOP_COMPANIES:
+            lightest = min(self.top_companies, key=self.top_companies.get)
+            # Its later jobs would bring it back, so its estimate bounds
+            # its jobs of the day
+            self.top_cutoff = max(
+                self.top_cutoff, self.top_companies.pop(lightest)
+            )
+
+
+    def add_technologies(self, mask: int, count: int = 1) -> None:
+        self.technology_counts += unpack_masks(
+            np.array([mask], dtype=np.int64)
+        )[0] * count
+
+
+class PendingSketches:
+    """
+    Sketches of the jobs added during a crawl, merged into the stored
+    day rows at once by ``save``. Locking and rewriting its day's row
+    for each job would queue every pipeline thread on that row, so the
+    approximate dashboard only sees a crawl's jobs once it ends.
+
+    Technologies found later for a stored job only add to the
+    technology counts, the job and its company were counted already.
+    """
+
+    def __init__(self) -> None:
+        self.sketches: Dict[tuple, JobSketch] = {}
+        self.lock = threading.Lock()
+
+    def add(
+            self, job_date: date, experience: int, company: str, mask: int
+    ) -> None:
+        key = (job_date, experience_level(experience))
+        with self.lock:
+            self.sketches.setdefault(key, JobSketch()).add(company, mask)
+
+    def add_technologies(
+            self, job_date: date, experience: int, mask: int
+    ) -> None:
+        key = (job_date, experience_level(experience))
+        with self.lock:
+            self.sketches.setdefault(key, JobSketch()).add_technologies(mask)
+
+    def save(self) -> int:
+        """
+        :return: Number of day and level rows updated
+        """
+        with self.lock:
+            sketches, self.sketches = self.sketches, {}
+        with transaction.atomic():
+            # Always locked in the same order, concurrent crawls can't
+            # deadlock
+            for (job_date, level), sketch in sorted(sketches.items()):
+                row, _ = JobDaySketch.objects.select_for_update().get_or_create(
+                    date=job_date, experience_level=level
+                )
+                stored = JobSketch.from_model(row)
+                stored.merge(sketch)
+                stored.save_to(row).save()
+        return len(sketches)
+
+
+def rebuild_sketches(
+        date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> int:
+    """
+    Recomputes the sketches of every day between the dates that still
+    has jobs, after bulk loads. Days whose jobs were archived keep theirs.
+
+    :return: Number of days rebuilt
+    """
+    jobs = JobFilters(date_from=date_from, date_to=date_to).apply(
+        Job.objects.all()
+    )
+    groups: Dict[tuple, Dict[tuple, int]] = {}
+    for job_date, experience, company, mask, count in (
+            jobs.values_list(
+                "date", "experience", "company", "technology_mask"
+            )
+            .annotate(count=Count("id"))
+            .order_by()
+            .iterator()
+    ):
+        group = groups.setdefault((job_date, experience_level(experience)), {})
+        group[company, mask] = group.get((company, mask), 0) + count
+
+    rows = []
+    for (job_date, level), counts in groups.items():
+        sketch = JobSketch()
+        company_totals: Dict[str, int] = {}
+        for (company, mask), count in counts.items():
+            sketch.add(company, mask, count)
+            company_totals[company] = company_totals.get(company, 0) + count
+        # Exact counts are known here, keep the truly heaviest companies
+        top = sorted(company_totals.items(), key=lambda item: -item[1])
+        sketch.top_companies = dict(top[:TOP_COMPANIES])
+        sketch.top_cutoff = (
+            top[TOP_COMPANIES][1] if len(top) > TOP_COMPANIES else 0
+        )
+        rows.append(sketch.save_to(
+            JobDaySketch(date=job_date, experience_level=level)
+        ))
+
+    days = {job_date for job_date, _ in groups}
+    with transaction.atomic():
+        JobDaySketch.objects.filter(date__in=days).delete()
+        JobDaySketch.objects.bulk_create(rows, batch_size=1000)
+    return len(days)
+
+
+def supports(filters: JobFilters) -> bool:
+    """Sketches are kept per day and level, finer filters need the jobs."""
+    return not (
+        filters.experience or filters.english
+        or filters.technologies or filters.any_technologies
+    )
+
+
+def sketch_rows(filters: JobFilters) -> QuerySet:
+    rows = JobDaySketch.objects.all()
+    if filters.date_from:
+        rows = rows.filter(date__gte=filters.date_from)
+    if filters.date_to:
+        rows = rows.filter(date__lte=filters.date_to)
+    if filters.levels:
+        rows = rows.filter(experience_level__in=filters.levels)
+    return rows
+
+
+def technology_counts(filters: JobFilters) -> List[Dict[str, Any]]:
+    """Same rows as the exact technology aggregate, from the day counts."""
+    totals: Dict[str, np.ndarray] = {}
+    for level, counts in sketch_rows(filters).values_list(
+            "experience_level", "technology_counts").iterator():
+        total = totals.setdefault(
+            level, np.zeros(len(TECHNOLOGIES), dtype=np.int64)
+        )
+        total[:len(counts)] += counts
+    return [
+        {"technologies__name": name, "experience_level": level,
+         "count": int(count)}
+        for level, total in sorted(totals.items())
+        for name, count in sorted(zip(TECHNOLOGIES, total))
+        if count
+    ]
+
+
+def company_rows(filters: JobFilters, min_vacancies: int):
+    """
+    One row per company and day, for the companies estimated to have at
+    least ``min_vacancies`` jobs, shaped like the job rows of the exact
+    company aggregate. Candidates are the heaviest companies of each day
+    and level: a company's day is missed when it is left out of all of
+    them, with at most the summed cutoffs of the day's levels (see
+    ``approximation_summary``).
+    """
+    import pandas as pd
+
+    total = CountMinSketch()
+    daily: Dict[tuple, int] = {}
+    for row in sketch_rows(filters).only(
+            "date", "company_counts", "top_companies").iterator():
+        total.merge(CountMinSketch(unpack(
+            row.company_counts, np.uint32, CountMinSketch.shape
+        )))
+        for company, count in row.top_companies.items():
+            daily[row.date, company] = daily.get((row.date, company), 0) + count
+
+    estimates = {
+        company: total.estimate(company_hashes(company))
+        for company in {company for _, company in daily}
+    }
+    rows = [
+        (job_date, company, count, estimates[company])
+        for (job_date, company), count in daily.items()
+        if estimates[company] >= min_vacancies
+    ]
+    df = pd.DataFrame(
+        rows, columns=["date", "company", "count", "estimate"]
+    )
+    df["english"] = ""
+    df["experience"] = 0
+    df["url"] = ""
+    df["title"] = [
+        f"≈{count} із ≈{estimate} вакансій"
+        for count, estimate in zip(df["count"], df["estimate"])
+    ]
+    return df[["date", "company", "english", "experience", "url", "title"]]
+
+
+def approximation_summary(filters: JobFilters) -> Dict[str, Any]:
+    """Job and distinct company counts, with the error bounds shown."""
+    jobs = 0
+    companies = HyperLogLog()
+    day_cutoffs: Dict[date, int] = {}
+    rows = sketch_rows(filters).values_list(
+        "date", "jobs", "companies_hll", "top_companies_cutoff"
+    )
+    for job_date, row_jobs, registers, cutoff in rows.iterator():
+        jobs += row_jobs
+        companies.merge(HyperLogLog(
+            unpack(registers, np.uint8, HyperLogLog.size)
+        ))
+        # A company's day is only missing from the chart when it was left
+        # out of the top of each level that day
+        day_cutoffs[job_date] = day_cutoffs.get(job_date, 0) + cutoff
+    return {
+        "jobs": jobs,
+        "companies": round(companies.estimate()),
+        # Two standard errors, about 95% of estimates fall within
+        "companies_error": round(200 * HyperLogLog.relative_error, 1),
+        "company_count_error": CountMinSketch.error(jobs),
+        "company_count_confidence": round(
+            100 * CountMinSketch.confidence, 1
+        ),
+        # A company's day with more jobs is always in the company chart.
+        # Per day, as summed over the range the bound would soon exceed
+        # the jobs themselves
+        "company_day_missed_at_most": max(day_cutoffs.values(), default=0),
+    }
@@ -0,0 +1,147 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .exports import chunked, job_rows, CHUNK_SIZE, JOB_COLUMNS
+from .bitmask import match_masks
+from .filters import JobFilters, experience_level
+from .versioning import get_data_version
+
+SNAPSHOT_FIELDS = JOB_COLUMNS[:-1] + ["technology_mask"]
+
+_cached_snapshot: dict = {}
+
+
+def snapshot_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("title", pa.string()),
+        ("company", pa.string()),
+        ("url", pa.string()),
+        ("english", pa.string()),
+        ("experience", pa.int64()),
+        ("technology_mask", pa.int64()),
+        ("technologies", pa.list_(pa.string())),
+    ])
+
+
+def write_snapshot(path: Optional[Path] = None) -> int:
+    """
+    Writes every job with its technologies to an Arrow IPC file, so web
+    workers can memory-map it instead of querying Postgres.
+
+    :param path: Target file, defaults to ``settings.JOB_SNAPSHOT_PATH``
+    :return: Number of jobs written
+    """
+    import pyarrow as pa
+
+    path = Path(path or settings.JOB_SNAPSHOT_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Taken before reading, so any change meanwhile (new jobs, technologies
+    # added to a job, compacted months) makes the snapshot stale
+    schema = snapshot_schema().with_metadata(
+        {"data_version": str(get_data_version())}
+    )
+    temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+    written = 0
+    with pa.OSFile(str(temporary_path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for chunk in chunked(job_rows(JobFilters(), SNAPSHOT_FIELDS), CHUNK_SIZE):
+                columns = list(zip(*chunk))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(column, type=field.type)
+                     for column, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                written += len(chunk)
+    # Readers keep their mapping of the old file until they reopen it
+    os.replace(temporary_path, path)
+    return written
+
+
+def load_snapshot(path: Optional[Path] = None):
+    """
+    Returns the memory-mapped job snapshot as a ``pyarrow.Table``, or
+    None when the file is missing or the jobs changed since it was
+    written, i.e. the data version moved on.
+    """
+    import pyarrow as pa
+
+    path = Path(path or settings.JOB_SNAPSHOT_PATH)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    table = _cached_snapshot.get(key)
+    if table is None:
+        source = pa.memory_map(str(path), "r")
+        table = pa.ipc.open_file(source).read_all()
+        _cached_snapshot.clear()
+        _cached_snapshot[key] = table
+
+    version = table.schema.metadata.get(b"data_version")
+    if version is None or int(version) != get_data_version():
+        return None
+    return table
+
+
+def filter_snapshot(table, filters: JobFilters):
+    """Applies the same filters as ``JobFilters.to_q`` to a snapshot."""
+    if not filters:
+        return table
+
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    selected = np.ones(table.num_rows, dtype=bool)
+    if filters.date_from:
+        selected &= pc.greater_equal(
+            table["date"], pa.scalar(filters.date_from, pa.date32())
+        ).to_numpy()
+    if filters.date_to:
+        selected &= pc.less_equal(
+            table["date"], pa.scalar(filters.date_to, pa.date32())
+        ).to_numpy()
+    experience = table["experience"].to_numpy()
+    if filters.experience:
+        selected &= np.isin(experience, filters.experience)
+    if filters.levels:
+        years, inverse = np.unique(experience, return_inverse=True)
+        levels = np.array([experience_level(year) for year in years])
+        selected &= np.isin(levels, filters.levels)[inverse]
+    if filters.english:
+        selected &= pc.is_in(
+            table["english"], value_set=pa.array(filters.english)
+        ).to_numpy()
+    if filters.technologies or filters.any_technologies:
+        selected &= match_masks(
+            table["technology_mask"].to_numpy(),
+            filters.technologies,
+            filters.any_technologies,
+        )
+    return table.filter(pa.array(selected))
+
+
+def snapshot_technology_counts(table) -> List[Dict[str, Any]]:
+    """
+    Counts technologies by experience level the same way the
+    ``technologies__name``/``experience_level`` ORM aggregation does.
+    """
+    df = table.select(["experience", "technologies"]).to_pandas()
+    df["experience_level"] = df["experience"].map(experience_level)
+    df = df.explode("technologies").dropna(subset=["technologies"])
+    counts = (
+        df.groupby(["experience_level", "technologies"])
+        .size()
+        .reset_index(name="count")
+        .rename(columns={"technologies": "technologies__name"})
+    )
+    return counts.to_dict("records")
@@ -5,3 +5,15 @@ from django.core.management import call_command
 @shared_task
 def run_spider(technologies):
     call_command('runspider', technologies)
+    render_static.delay()
+
+
+@shared_task
+def render_static():
+    call_command('renderstatic')
+
+
+@shared_task
+def compact_jobs():
+    call_command('compactjobs')
+    render_static.delay()
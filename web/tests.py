@@ -1,3 +1,471 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from pandas.testing import assert_frame_equal
+
+from .aggregates import aggregate_company_data
+from .api import page_params
+from .bitmask import technology_mask
+from .filters import JobFilters
+from .live import job_event
+from .models import Job
+from .sketches import (
+    CountMinSketch, HyperLogLog, JobSketch, TOP_COMPANIES,
+    approximation_summary, company_hashes, company_rows, rebuild_sketches,
+)
+from .snapshot import filter_snapshot, load_snapshot, write_snapshot
+from .versioning import bump_data_version, page_id
+from .views import cached_aggregate, dashboard_params
+
+IMPORT_TIME_LINE = re.compile(
+    r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$"
+)
+
+
+def import_time(module: str) -> tuple[float, list[tuple[float, str]]]:
+    """
+    Runs ``django.setup()`` then imports the module in a fresh
+    interpreter, the way the web, Celery and crawler processes start.
+    The setup's own imports are counted too, most of the startup.
+
+    :return: Total import time in ms and the top-level imports with
+        their cumulative time in ms, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import django; django.setup(); import {module}"],
+        capture_output=True, text=True, env=os.environ,
+        cwd=settings.BASE_DIR, check=True,
+    )
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        # Nested imports are indented below the top-level one
+        if match and len(match.group(3)) == 1:
+            top_level.append((int(match.group(2)) / 1000, match.group(4)))
+    top_level.sort(reverse=True)
+    return sum(cumulative for cumulative, _ in top_level), top_level
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_entry_points_within_their_budgets(self):
+        for module, budget in settings.IMPORT_TIME_BUDGETS.items():
+            with self.subTest(module=module):
+                total, imports = import_time(module)
+                slowest = ", ".join(
+                    f"{name} {cumulative:.0f} ms"
+                    for cumulative, name in imports[:5]
+                )
+                self.assertLessEqual(
+                    total, budget, f"{module}, slowest: {slowest}"
+                )
+
+
+class JobEventTests(SimpleTestCase):
+    def test_experience_from_the_spider(self):
+        # The pipeline publishes the job before reloading it, with the
+        # years still as scraped
+        job = Job(
+            date=date(2024, 1, 15), title="Python Developer",
+            company="Acme", url="https://example.com/1", english="B2",
+            experience="2",
+        )
+        event = job_event(job, ["Python", "Django", "Python"])
+        self.assertEqual(event["experience"], 2)
+        self.assertEqual(event["level"], "Middle")
+        self.assertEqual(event["technologies"], ["Django", "Python"])
+        self.assertTrue(JobFilters(levels=("Middle",)).matches(event))
+
+
+def create_jobs(count: int) -> None:
+    Job.objects.bulk_create(
+        Job(
+            date=date(2024, 1, 1 + i % 5), title=f"Developer {i}",
+            company=f"Company {i % 7}", url=f"https://example.com/{i}",
+            english="B2", experience=i % 6,
+        )
+        for i in range(count)
+    )
+
+
+def tampered_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class ChunkedAggregationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_jobs(60)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot_path = Path(directory.name) / "jobs.arrow"
+        self.enterContext(override_settings(
+            JOB_SNAPSHOT_PATH=str(self.snapshot_path),
+            DASHBOARD_APPROXIMATE_AGGREGATION=False,
+            DASHBOARD_CHUNKED_AGGREGATION=False,
+        ))
+
+    def chunked_company_data(self, filters, min_vacancies, **settings):
+        # A few jobs per chunk, so points span several chunks
+        with override_settings(DASHBOARD_CHUNKED_AGGREGATION=True,
+                               **settings), \
+                mock.patch("web.incremental.chunk_size", return_value=4):
+            return aggregate_company_data(filters, min_vacancies)
+
+    def test_chunked_company_points_equal_in_memory_ones(self):
+        for filters, min_vacancies in (
+                (JobFilters(), 9), (JobFilters(levels=("Middle",)), 3)
+        ):
+            expected = aggregate_company_data(filters, min_vacancies)
+            self.assertTrue(len(expected))
+            assert_frame_equal(
+                self.chunked_company_data(filters, min_vacancies), expected
+            )
+
+    def test_chunked_company_points_from_the_snapshot(self):
+        write_snapshot()
+        expected = aggregate_company_data(JobFilters(), 9)
+        assert_frame_equal(
+            self.chunked_company_data(JobFilters(), 9), expected
+        )
+
+    def test_company_points_grouped_by_postgres_past_the_ceiling(self):
+        expected = aggregate_company_data(JobFilters(), 9)
+        with self.assertLogs("web.aggregates", "WARNING"):
+            grouped = self.chunked_company_data(
+                JobFilters(), 9, DASHBOARD_MEMORY_CEILING=1
+            )
+        assert_frame_equal(grouped, expected)
+
+
+class VersionedPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_page_id_ignores_unknown_and_reordered_parameters(self):
+        factory = RequestFactory()
+
+        def dashboard(query):
+            return page_id(factory.get("/", query), dashboard_params)
+
+        page = dashboard({"level": "Middle", "english": "B2"})
+        self.assertEqual(
+            dashboard({"english": "B2", "level": "Middle", "x": "1"}), page
+        )
+        self.assertEqual(
+            dashboard({"level": "Middle", "english": "B2", "period": "day"}),
+            page,
+        )
+        self.assertNotEqual(dashboard({"level": "Middle"}), page)
+        self.assertNotEqual(
+            dashboard({"level": "Middle", "english": "B2",
+                       "min_vacancies": "5"}),
+            page,
+        )
+        self.assertNotEqual(
+            page_id(factory.get("/api/companies/", {"limit": "5"}),
+                    page_params),
+            page_id(factory.get("/api/companies/"), page_params),
+        )
+
+    def test_not_modified_until_the_data_changes(self):
+        response = self.client.get("/api/companies/")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = self.client.get(
+            "/api/companies/", {"x": "1"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+        bump_data_version()
+        response = self.client.get(
+            "/api/companies/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_stays_fresh_when_the_cache_is_flushed(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+                JOB_SNAPSHOT_PATH=str(Path(directory) / "jobs.arrow")
+        ):
+            write_snapshot()
+            cache.clear()
+            self.assertIsNotNone(load_snapshot())
+            bump_data_version()
+            self.assertIsNone(load_snapshot())
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_jobs(30)
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, path):
+        results, cursor = [], None
+        while True:
+            query = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(path, query)
+            self.assertEqual(response.status_code, 200)
+            results += response.json()["results"]
+            cursor = response.json()["next"]
+            if cursor is None:
+                return results
+
+    def test_cursors_walk_every_job_once_in_order(self):
+        ids = [job["id"] for job in self.walk("/api/jobs/")]
+        self.assertEqual(
+            ids, list(Job.objects.order_by("-date", "-id")
+                      .values_list("id", flat=True))
+        )
+
+    def test_cursors_walk_every_company_once_in_order(self):
+        companies = self.walk("/api/companies/")
+        self.assertEqual(len(companies), 7)
+        self.assertEqual(
+            companies,
+            sorted(companies, key=lambda row: (-row["count"], row["company"]))
+        )
+
+    def test_tampered_cursors_are_rejected(self):
+        for path, values in [
+            ("/api/jobs/", ["x", 1]),
+            ("/api/jobs/", [None, 1]),
+            ("/api/jobs/", [{"date": "2024-01-01"}, 10 ** 30]),
+            ("/api/jobs/", [{"date": "2024-01-01"}]),
+            ("/api/companies/", ["x", "Company 1"]),
+        ]:
+            with self.subTest(path=path, values=values):
+                response = self.client.get(
+                    path, {"cursor": tampered_cursor(values)}
+                )
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/jobs/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CachedAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_none_is_cached_too(self):
+        compute = mock.Mock(return_value=None)
+        for _ in range(2):
+            self.assertIsNone(cached_aggregate("test", JobFilters(), compute))
+        compute.assert_called_once_with(JobFilters())
+
+
+class ImportFeedTests(TestCase):
+    def test_invalid_items_are_skipped(self):
+        item = {
+            "date_posted": "2024-01-15", "title": "Python Developer",
+            "company": "Acme", "url": "https://example.com/1",
+            "english": "B2", "experience": "2",
+            "technologies": ["Python", "Django"],
+        }
+        lines = [
+            json.dumps(item),
+            '{"date_posted": "2024-01-16", "title": ',
+            json.dumps({**item, "title": "No URL", "url": None}),
+            json.dumps({key: value for key, value in item.items()
+                        if key != "url"}),
+            json.dumps({**item, "date_posted": "2024-13-01"}),
+            json.dumps({**item, "title": "x" * 256}),
+            json.dumps({**item, "experience": "two"}),
+            json.dumps({**item, "title": "Go Developer",
+                        "url": "https://example.com/2"}),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "feed.jsonl"
+            path.write_text("\n".join(lines) + "\n")
+            stdout = StringIO()
+            call_command("importfeed", str(path), stdout=stdout)
+
+        self.assertIn("created 2 jobs, skipped 6 invalid items",
+                      stdout.getvalue())
+        job = Job.objects.get(title="Python Developer")
+        self.assertEqual(job.date, date(2024, 1, 15))
+        self.assertEqual(
+            sorted(job.technologies.values_list("name", flat=True)),
+            ["Django", "Python"],
+        )
+
+
+class SketchTests(SimpleTestCase):
+    def test_hyperloglog_estimate(self):
+        for companies in (100, 20_000):
+            hll = HyperLogLog()
+            for i in range(companies):
+                hll.add(company_hashes(f"Company {i}")[0])
+            # Three standard errors
+            self.assertAlmostEqual(
+                hll.estimate(), companies,
+                delta=3 * HyperLogLog.relative_error * companies,
+            )
+
+    def test_count_min_estimates(self):
+        counts = {f"Company {i}": i % 40 + 1 for i in range(5000)}
+        sketch = CountMinSketch()
+        for company, count in counts.items():
+            sketch.add(company_hashes(company), count)
+        error = CountMinSketch.error(sum(counts.values()))
+        within = 0
+        for company, count in counts.items():
+            estimate = sketch.estimate(company_hashes(company))
+            self.assertGreaterEqual(estimate, count)
+            within += estimate - count <= error
+        self.assertGreaterEqual(
+            within / len(counts), CountMinSketch.confidence
+        )
+
+    def test_top_cutoff_bounds_the_companies_left_out(self):
+        def day_sketch(seed):
+            sketch, counts = JobSketch(), {}
+            # Interleaved, so companies enter and leave the top
+            for i in range(3000):
+                company = f"Company {(i * seed) % 173 % (i % 97 + 1)}"
+                sketch.add(company, 0)
+                counts[company] = counts.get(company, 0) + 1
+            return sketch, counts
+
+        merged, merged_counts = day_sketch(7)
+        self.assertGreater(len(merged_counts), TOP_COMPANIES)
+        other, other_counts = day_sketch(11)
+        for sketch, counts in ((merged, merged_counts), (other, other_counts)):
+            for company, count in counts.items():
+                if company not in sketch.top_companies:
+                    self.assertLessEqual(count, sketch.top_cutoff)
+
+        merged.merge(other)
+        for company in {*merged_counts, *other_counts}:
+            if company not in merged.top_companies:
+                self.assertLessEqual(
+                    merged_counts.get(company, 0)
+                    + other_counts.get(company, 0),
+                    merged.top_cutoff,
+                )
+
+    def test_technologies_found_later_are_counted_once(self):
+        sketch = JobSketch()
+        sketch.add("Acme", 0b01)
+        sketch.add_technologies(0b10)
+        self.assertEqual(sketch.jobs, 1)
+        self.assertEqual(sketch.technology_counts[:2].tolist(), [1, 1])
+
+
+class SketchBoundTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        jobs = []
+        for day in range(1, 4):
+            for company in range(120):
+                for i in range(company % 9 * day % 7 + 1):
+                    jobs.append(Job(
+                        date=date(2024, 2, day), title=f"Developer {i}",
+                        company=f"Company {company}",
+                        url=f"https://example.com/{day}/{company}/{i}",
+                        english="B2", experience=company % 2 * 3,
+                    ))
+        Job.objects.bulk_create(jobs)
+        rebuild_sketches()
+
+    def test_company_days_above_the_bound_are_on_the_chart(self):
+        summary = approximation_summary(JobFilters())
+        bound = summary["company_day_missed_at_most"]
+        days = {
+            (job_date, company): count for job_date, company, count in
+            Job.objects.values_list("date", "company")
+            .annotate(count=Count("id")).order_by()
+        }
+        self.assertLess(bound, max(
+            Job.objects.filter(date=date(2024, 2, day)).count()
+            for day in range(1, 4)
+        ))
+        charted = set(
+            company_rows(JobFilters(), 1)[["date", "company"]]
+            .itertuples(index=False, name=None)
+        )
+        for day, count in days.items():
+            if count > bound:
+                self.assertIn(day, charted)
+
+
+class JobFiltersTests(TestCase):
+    TECHNOLOGY_SETS = [
+        [], ["Django"], ["Django", "DRF"], ["AWS", "Celery"],
+        ["Django", "AWS", "Celery"],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        Job.objects.bulk_create(
+            Job(
+                date=date(2024, 1 + i % 3, 1 + i % 28), title=f"Developer {i}",
+                company=f"Company {i % 5}", url=f"https://example.com/{i}",
+                english=["B1", "B2", "C1"][i % 3], experience=i % 8,
+                technology_mask=technology_mask(
+                    cls.TECHNOLOGY_SETS[i % len(cls.TECHNOLOGY_SETS)]
+                ),
+            )
+            for i in range(120)
+        )
+
+    def test_database_live_and_snapshot_filters_agree(self):
+        jobs = list(Job.objects.values(
+            "id", "date", "english", "experience", "technology_mask"
+        ))
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "jobs.arrow"
+            write_snapshot(path)
+            snapshot = load_snapshot(path)
+        for filters in [
+            JobFilters(),
+            JobFilters(date_from=date(2024, 2, 1), date_to=date(2024, 2, 15)),
+            JobFilters(experience=(1, 4)),
+            JobFilters(levels=("Junior", "Other")),
+            JobFilters(levels=("Senior",), english=("B2", "C1")),
+            JobFilters(technologies=("DRF", "Django")),
+            JobFilters(any_technologies=("AWS", "DRF")),
+            JobFilters(technologies=("Django",), any_technologies=("Celery",),
+                       levels=("Middle", "Senior")),
+        ]:
+            with self.subTest(filters=filters):
+                expected = set(
+                    filters.apply(Job.objects.all())
+                    .values_list("id", flat=True)
+                )
+                self.assertTrue(expected)
+                self.assertEqual(
+                    {job["id"] for job in jobs if filters.matches(job)},
+                    expected,
+                )
+                self.assertEqual(
+                    set(filter_snapshot(snapshot, filters)["id"].to_pylist()),
+                    expected,
+                )
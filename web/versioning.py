@@ -0,0 +1,211 @@
+import asyncio
+import gzip
+import hashlib
+import re
+import time
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .filters import JobFilters
+from .models import DataVersion
+
+DATA_VERSION_KEY = "data-version"
+
+# Preferred first, identity ("") is always available
+ENCODINGS = ["br", "gzip", ""]
+
+
+def bump_data_version() -> int:
+    """
+    Marks the jobs as changed. The version is the time of the change in
+    microseconds, so it doubles as the Last-Modified date.
+    """
+    version = time.time_ns() // 1000
+    DataVersion.objects.update_or_create(pk=1, defaults={"version": version})
+    cache.set(DATA_VERSION_KEY, version, None)
+    return version
+
+
+def stored_data_version() -> int:
+    # A new database starts a version
+    stored, _ = DataVersion.objects.get_or_create(
+        pk=1, defaults={"version": time.time_ns() // 1000}
+    )
+    return stored.version
+
+
+def get_data_version() -> int:
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # Flushed or evicted from the cache, the database still has it.
+        # A bump meanwhile has set the key, and wins
+        version = stored_data_version()
+        if not cache.add(DATA_VERSION_KEY, version, None):
+            version = cache.get(DATA_VERSION_KEY, version)
+    return version
+
+
+async def aget_data_version() -> int:
+    version = await cache.aget(DATA_VERSION_KEY)
+    if version is None:
+        version = await sync_to_async(get_data_version)()
+    return version
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+
+        # Pages are compressed once per data version, so a high quality
+        # pays off, 11 would take seconds on the dashboard though
+        return brotli.compress(content, quality=9)
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=9, mtime=0)
+    return content
+
+
+def accepted_encoding(request: HttpRequest) -> str:
+    accept = request.headers.get("Accept-Encoding", "")
+    for encoding in ENCODINGS[:-1]:
+        if re.search(rf"\b{encoding}\b(?!;\s*q=0(\.0*)?\b)", accept):
+            return encoding
+    return ""
+
+
+def page_id(
+        request: HttpRequest, params: Callable[[HttpRequest], tuple]
+) -> str:
+    """
+    Identifies a page by its path, filters and the other parameters its
+    view reads, all normalized: unknown, reordered or invalid query
+    parameters don't make a new copy of it.
+    """
+    key = repr((
+        request.path, JobFilters.from_request(request).cache_key(),
+        *params(request),
+    ))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def page_key(page: str, version: int, encoding: str) -> str:
+    return f"page:{version}:{encoding or 'identity'}:{page}"
+
+
+def page_etag(version: int, encoding: str) -> str:
+    # Each encoding is a different representation, with its own strong ETag
+    return f'"{version}-{encoding}"' if encoding else f'"{version}"'
+
+
+def conditional_response(
+        request: HttpRequest, version: int, encoding: str
+) -> Optional[HttpResponse]:
+    etag = page_etag(version, encoding)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=version // 1_000_000
+    )
+    if response is not None:
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def cached_page(
+        version: int, encoding: str, page: Optional[dict]
+) -> Optional[HttpResponse]:
+    if page is None:
+        return None
+    response = HttpResponse(page["content"], content_type=page["content_type"])
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["ETag"] = page_etag(version, encoding)
+    response.headers["Last-Modified"] = http_date(version // 1_000_000)
+    response.headers["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def compressed_pages(
+        page: str, version: int, response: HttpResponse
+) -> Dict[str, dict]:
+    """Compresses a rendered page for every encoding, keyed for the cache."""
+    return {
+        page_key(page, version, encoding): {
+            "content": compress(response.content, encoding),
+            "content_type": response["Content-Type"],
+        }
+        for encoding in ENCODINGS
+    }
+
+
+def versioned_page(params: Callable[[HttpRequest], tuple]) -> Callable:
+    """
+    Serves a GET view from precompressed copies stored once per data
+    version, answering with 304 while the client's copy is current.
+    ``params`` returns the parameters the view reads besides the filters,
+    normalized, they identify the page with its path and filters.
+
+    Works for both sync and async views, unlike Django's ``condition``.
+    """
+
+    def cacheable(request: HttpRequest) -> bool:
+        return request.method in ("GET", "HEAD")
+
+    def store(page, version, encoding, response) -> HttpResponse:
+        if response.status_code != 200 or response.streaming:
+            return response
+        pages = compressed_pages(page, version, response)
+        cache.set_many(pages, settings.DASHBOARD_CACHE_TIMEOUT)
+        return cached_page(
+            version, encoding, pages[page_key(page, version, encoding)]
+        )
+
+    def decorator(view: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if not cacheable(request):
+                    return await view(request, *args, **kwargs)
+                version = await aget_data_version()
+                encoding = accepted_encoding(request)
+                not_modified = conditional_response(request, version, encoding)
+                if not_modified is not None:
+                    return not_modified
+                page = page_id(request, params)
+                response = cached_page(version, encoding, await cache.aget(
+                    page_key(page, version, encoding)
+                ))
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    response = await sync_to_async(
+                        store, thread_sensitive=False
+                    )(page, version, encoding, response)
+                return response
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if not cacheable(request):
+                    return view(request, *args, **kwargs)
+                version = get_data_version()
+                encoding = accepted_encoding(request)
+                not_modified = conditional_response(request, version, encoding)
+                if not_modified is not None:
+                    return not_modified
+                page = page_id(request, params)
+                response = cached_page(version, encoding, cache.get(
+                    page_key(page, version, encoding)
+                ))
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                    response = store(page, version, encoding, response)
+                return response
+
+        return wrapper
+
+    return decorator